@@ -9,6 +9,18 @@ def create_app():
     CORS(app)
     # Initialize database
     init_db(app)
+    # Knowledge base; embeddings and the vector store load on first query
+    if Config.RAG_ENABLED:
+        from app.services.rag_service import RAGService
+        app.rag_service = RAGService(
+            Config.GROQ_API_KEY,
+            db_path=Config.VECTOR_DB_PATH,
+            coalesce_timeout=Config.COALESCE_TIMEOUT_RAG,
+            model=Config.RAG_MODEL,
+            request_timeout=Config.LLM_LATENCY_BUDGET,
+            vector_backend=Config.VECTOR_BACKEND,
+            vector_dtype=Config.VECTOR_DTYPE
+        )
     # Register blueprints
     from app.routes import api
     app.register_blueprint(api)
@@ -17,12 +17,83 @@ class Config:
     MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
     MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'voicebot_analytics')
     
+    # Gunicorn threads per worker; the start commands pass --threads $WEB_THREADS.
+    # An open dashboard stream holds a thread for as long as it is open, so
+    # 32 threads leave 8 for streams (ANALYTICS_MAX_STREAMS) with 24 still
+    # serving requests (see admission control below). Requests are I/O bound
+    # (Groq, Deepgram, Mongo), so threads are cheap.
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 32))
+    
+    # Analytics dashboard push updates; further dashboards fall back to ETag polling
+    ANALYTICS_MAX_STREAMS = int(os.getenv('ANALYTICS_MAX_STREAMS', 8))
+    ANALYTICS_SUMMARY_INTERVAL = float(os.getenv('ANALYTICS_SUMMARY_INTERVAL', 2.0))
+    ANALYTICS_SNAPSHOT_TTL = float(os.getenv('ANALYTICS_SNAPSHOT_TTL', 5.0))
+    
+    # Bearer token for GET /api/export/conversations; the endpoint is disabled when unset
+    EXPORT_API_TOKEN = os.getenv('EXPORT_API_TOKEN')
+    
+    # X-Replay value that stops replayed chat turns being logged (scripts/replay_conversations.py)
+    REPLAY_TOKEN = os.getenv('REPLAY_TOKEN')
+    
     # API Keys
     DEEPGRAM_API_KEY = os.getenv('DEEPGRAM_API_KEY')
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     
     # Groq Model
     GROQ_MODEL = 'llama-3.3-70b-versatile'
+    GROQ_FAST_MODEL = os.getenv('GROQ_FAST_MODEL', 'llama-3.1-8b-instant')
+    RAG_MODEL = os.getenv('RAG_MODEL', GROQ_MODEL)  # knowledge base answers; timeout is LLM_LATENCY_BUDGET
+    
+    # Model routing: seconds per turn, hedge delay, circuit breaker
+    LLM_LATENCY_BUDGET = float(os.getenv('LLM_LATENCY_BUDGET', 8.0))
+    LLM_HEDGE_DELAY = float(os.getenv('LLM_HEDGE_DELAY', 2.5))
+    LLM_SIMPLE_QUERY_MAX_CHARS = int(os.getenv('LLM_SIMPLE_QUERY_MAX_CHARS', 80))
+    LLM_BREAKER_FAILURES = int(os.getenv('LLM_BREAKER_FAILURES', 5))
+    LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', 30.0))
+    
+    # Knowledge base (RAG); off by default since the embedding model needs several hundred MB
+    RAG_ENABLED = os.getenv('RAG_ENABLED', 'false').lower() == 'true'
+    
+    # Vector store: 'chroma' or 'numpy' (memory-mapped, for small knowledge bases)
+    VECTOR_BACKEND = os.getenv('VECTOR_BACKEND', 'chroma')
+    VECTOR_DTYPE = os.getenv('VECTOR_DTYPE', 'float32')  # numpy backend: float32, float16 or int8
+    VECTOR_DB_PATH = os.getenv('VECTOR_DB_PATH', f'{VECTOR_BACKEND}_db')  # one directory per backend
+    
+    # Prompt token budgets (per turn); sections are clamped to fit PROMPT_TOKEN_BUDGET
+    PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', 1500))
+    PROMPT_CONTEXT_TOKENS = int(os.getenv('PROMPT_CONTEXT_TOKENS', 250))
+    PROMPT_RAG_TOKENS = int(os.getenv('PROMPT_RAG_TOKENS', 400))
+    PROMPT_SUMMARY_TOKENS = int(os.getenv('PROMPT_SUMMARY_TOKENS', 200))
+    PROMPT_MESSAGE_TOKENS = int(os.getenv('PROMPT_MESSAGE_TOKENS', 300))
+    
+    # Intent router (answers order status etc. without the LLM)
+    INTENT_ROUTER_ENABLED = os.getenv('INTENT_ROUTER_ENABLED', 'true').lower() == 'true'
+    INTENT_CONFIDENCE_THRESHOLD = float(os.getenv('INTENT_CONFIDENCE_THRESHOLD', 0.5))
+    INTENT_MARGIN = float(os.getenv('INTENT_MARGIN', 0.1))  # over the runner-up intent
+    
+    # Request coalescing: seconds a duplicate request waits for the in-flight one
+    COALESCE_TIMEOUT_LLM = float(os.getenv('COALESCE_TIMEOUT_LLM', 30))
+    COALESCE_TIMEOUT_RAG = float(os.getenv('COALESCE_TIMEOUT_RAG', 30))
+    COALESCE_TIMEOUT_TTS = float(os.getenv('COALESCE_TIMEOUT_TTS', 20))
+    
+    # Admission control (per worker process). The limits are derived from the
+    # thread budget: WEB_THREADS minus the dashboard streams and
+    # RESERVED_THREADS (pages, analytics polling, metrics, uploads) is split
+    # between the routes by ADMISSION_SHARES, a third of each share being
+    # queue. Running plus queued requests thus never exceed the worker's
+    # threads, so overload is shed here with a fast 503 before gunicorn's
+    # accept queue fills. With the defaults (32 - 8 - 4 = 20 threads): chat
+    # 8 running + 4 queued, transcribe and synthesize 3 + 1 each.
+    RESERVED_THREADS = int(os.getenv('RESERVED_THREADS', 4))
+    ADMISSION_THREADS = WEB_THREADS - ANALYTICS_MAX_STREAMS - RESERVED_THREADS
+    ADMISSION_SHARES = {'chat': 0.6, 'transcribe': 0.2, 'synthesize': 0.2}
+    ADMISSION_QUEUE_FRACTION = float(os.getenv('ADMISSION_QUEUE_FRACTION', 1 / 3))
+    ADMISSION_MAX_WAIT = float(os.getenv('ADMISSION_MAX_WAIT', 3.0))  # seconds
+    # Chat requests without a session_id are rate limited per client address
+    SESSION_RATE_LIMIT = float(os.getenv('SESSION_RATE_LIMIT', 1.0))  # chat requests/second
+    SESSION_RATE_BURST = int(os.getenv('SESSION_RATE_BURST', 5))
+    ACTIVE_SESSION_TTL = float(os.getenv('ACTIVE_SESSION_TTL', 120))
     
     # Upload settings
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
\ No newline at end of file
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', 2))
\ No newline at end of file
@@ -1,34 +1,161 @@
-﻿from flask import Blueprint, request, jsonify, render_template, current_app
+﻿from flask import Blueprint, Response, request, jsonify, render_template, current_app
 from app.models import Customer, Order
-from app.services import DeepgramService, GroqService, AnalyticsService
+from app.services import PromptBuilder, IntentRouter, IngestionQueue, AnalyticsBroadcaster
+from app.services.single_flight import single_flight
+from app.services.admission_control import AdmissionController, AdmissionRejected, limits_from_threads
+from app.services.export_service import ConversationExporter, EXPORT_FORMATS
 from app.config import Config
+from datetime import datetime
+from functools import wraps
+import hmac
 import uuid
 import os
+import time
 
 api = Blueprint('api', __name__)
 
-# Helper functions to get services lazily
+# Helper functions to get services lazily. Heavy SDKs (Deepgram, Groq,
+# pymongo) are imported on first use, not when the app boots.
 def get_deepgram_service():
     if not hasattr(current_app, '_deepgram'):
-        current_app._deepgram = DeepgramService(Config.DEEPGRAM_API_KEY)
+        from app.services.deepgram_service import DeepgramService
+        current_app._deepgram = DeepgramService(
+            Config.DEEPGRAM_API_KEY, coalesce_timeout=Config.COALESCE_TIMEOUT_TTS
+        )
     return current_app._deepgram
 
 def get_groq_service():
     if not hasattr(current_app, '_groq'):
-        current_app._groq = GroqService(Config.GROQ_API_KEY, Config.GROQ_MODEL)
+        from app.services.groq_service import GroqService
+        prompt_builder = PromptBuilder(
+            token_budget=Config.PROMPT_TOKEN_BUDGET,
+            context_budget=Config.PROMPT_CONTEXT_TOKENS,
+            rag_budget=Config.PROMPT_RAG_TOKENS,
+            summary_budget=Config.PROMPT_SUMMARY_TOKENS,
+            message_budget=Config.PROMPT_MESSAGE_TOKENS
+        )
+        current_app._groq = GroqService(
+            Config.GROQ_API_KEY, Config.GROQ_MODEL,
+            prompt_builder=prompt_builder,
+            coalesce_timeout=Config.COALESCE_TIMEOUT_LLM,
+            fast_model=Config.GROQ_FAST_MODEL,
+            latency_budget=Config.LLM_LATENCY_BUDGET,
+            hedge_delay=Config.LLM_HEDGE_DELAY,
+            simple_query_max_chars=Config.LLM_SIMPLE_QUERY_MAX_CHARS,
+            breaker_failures=Config.LLM_BREAKER_FAILURES,
+            breaker_reset=Config.LLM_BREAKER_RESET
+        )
     return current_app._groq
 
 def get_analytics_service():
     if not hasattr(current_app, '_analytics'):
         try:
+            from app.services.analytics_service import AnalyticsService
             current_app._analytics = AnalyticsService(Config.MONGODB_URI, Config.MONGODB_DB_NAME)
         except:
             current_app._analytics = None
     return current_app._analytics
 
+def get_analytics_broadcaster():
+    if not hasattr(current_app, '_analytics_broadcaster'):
+        analytics = get_analytics_service()
+        broadcaster = AnalyticsBroadcaster(
+            analytics,
+            summary_interval=Config.ANALYTICS_SUMMARY_INTERVAL,
+            snapshot_ttl=Config.ANALYTICS_SNAPSHOT_TTL,
+            max_subscribers=Config.ANALYTICS_MAX_STREAMS
+        )
+        if analytics:
+            analytics.add_listener(broadcaster.publish_conversation)
+        current_app._analytics_broadcaster = broadcaster
+    return current_app._analytics_broadcaster
+
+def get_intent_router():
+    if not Config.INTENT_ROUTER_ENABLED:
+        return None
+    if not hasattr(current_app, '_intent_router'):
+        current_app._intent_router = IntentRouter(
+            confidence_threshold=Config.INTENT_CONFIDENCE_THRESHOLD,
+            margin=Config.INTENT_MARGIN
+        )
+    return current_app._intent_router
+
+def get_admission_controller():
+    if not hasattr(current_app, '_admission'):
+        current_app._admission = AdmissionController(
+            limits=limits_from_threads(
+                Config.ADMISSION_THREADS,
+                Config.ADMISSION_SHARES,
+                Config.ADMISSION_MAX_WAIT,
+                queue_fraction=Config.ADMISSION_QUEUE_FRACTION
+            ),
+            session_rate=Config.SESSION_RATE_LIMIT,
+            session_burst=Config.SESSION_RATE_BURST,
+            active_session_ttl=Config.ACTIVE_SESSION_TTL
+        )
+    return current_app._admission
+
+def admission_controlled(route_name):
+    """Shed load for a route: fast 503/429 with Retry-After instead of queueing forever"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True) or {}
+            # The last forwarded address is the one our platform's proxy saw
+            client_id = request.access_route[-1] if request.access_route else None
+            try:
+                ticket = get_admission_controller().admit(
+                    route_name, data.get('session_id'), client_id=client_id
+                )
+            except AdmissionRejected as e:
+                print(f"🚦 Shed {route_name} request: {e.reason}")
+                response = jsonify({'error': e.reason, 'retry_after': e.retry_after})
+                response.status_code = e.status
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+            with ticket:
+                return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
 def get_rag_service():
     return current_app.rag_service if hasattr(current_app, 'rag_service') else None
 
+def get_ingestion_queue():
+    if not hasattr(current_app, '_ingestion'):
+        current_app._ingestion = IngestionQueue(max_workers=Config.INGEST_WORKERS)
+    return current_app._ingestion
+
+
+def has_valid_token(expected, provided):
+    """Constant-time check of a configured shared secret; an unset secret never matches"""
+    # compare_digest only accepts ASCII str, so compare bytes: header values
+    # can carry any character and must fail the check, not raise
+    return bool(expected) and bool(provided) and hmac.compare_digest(
+        expected.encode('utf-8'), provided.encode('utf-8')
+    )
+
+
+def log_chat_turn(session_id, user_message, response, customer_email):
+    # Replayed traffic (scripts/replay_conversations.py) must not be logged again;
+    # only callers holding REPLAY_TOKEN may opt out of logging
+    if has_valid_token(Config.REPLAY_TOKEN, request.headers.get('X-Replay')):
+        return
+
+    # Try to log analytics (but don't fail if it doesn't work)
+    try:
+        get_analytics_broadcaster()  # make sure dashboards hear about this turn
+        analytics = get_analytics_service()
+        if analytics:
+            analytics.log_conversation(
+                session_id=session_id,
+                user_input=user_message,
+                bot_response=response,
+                customer_email=customer_email
+            )
+    except Exception as e:
+        print(f"⚠️ Analytics logging failed: {e}")
+
 
 @api.route('/')
 def index():
@@ -36,6 +163,7 @@ def index():
 
 
 @api.route('/api/transcribe', methods=['POST'])
+@admission_controlled('transcribe')
 def transcribe():
     try:
         data = request.get_json()
@@ -58,6 +186,7 @@ def transcribe():
 
 
 @api.route('/api/chat', methods=['POST'])
+@admission_controlled('chat')
 def chat():
     try:
         data = request.get_json()
@@ -69,8 +198,37 @@ def chat():
         if not user_message:
             return jsonify({'error': 'No message provided'}), 400
 
+        # Later turns of this session get queue priority over new sessions
+        get_admission_controller().touch(session_id)
+
         print(f"📨 Chat request: {user_message}")
 
+        # Fast path: answer structured intents straight from the database
+        intent_router = get_intent_router()
+        if intent_router:
+            started = time.perf_counter()
+            routed = intent_router.route(
+                user_message,
+                customer_email=customer_email,
+                order_number=order_number
+            )
+            if routed:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                print(f"⚡ Fast path ({routed['intent']}) in {elapsed_ms:.1f}ms")
+                get_groq_service().record_turn(user_message, routed['response'], session_id=session_id)
+                log_chat_turn(session_id, user_message, routed['response'], customer_email)
+                return jsonify({
+                    'response': routed['response'],
+                    'session_id': session_id,
+                    'rag_sources': [],
+                    'used_rag': False,
+                    'intent': routed['intent']
+                })
+
+        # One latency budget for the whole request: RAG and the completion
+        # below each get only the time that is left
+        deadline = time.monotonic() + Config.LLM_LATENCY_BUDGET
+
         # Try RAG
         rag_context = None
         rag_sources = []
@@ -80,7 +238,7 @@ def chat():
         if rag_service:
             try:
                 print("🔍 Querying RAG...")
-                rag_result = rag_service.query(user_message)
+                rag_result = rag_service.query(user_message, deadline=deadline)
                 if rag_result["used_rag"] and rag_result["answer"]:
                     rag_context = rag_result["answer"]
                     rag_sources = rag_result["sources"]
@@ -95,29 +253,21 @@ def chat():
             user_message,
             customer_email=customer_email,
             order_number=order_number,
-            rag_context=rag_context
+            rag_context=rag_context,
+            session_id=session_id,
+            deadline=deadline
         )
 
         print(f"✅ Response generated")
 
-        # Try to log analytics (but don't fail if it doesn't work)
-        try:
-            analytics = get_analytics_service()
-            if analytics:
-                analytics.log_conversation(
-                    session_id=session_id,
-                    user_input=user_message,
-                    bot_response=response,
-                    customer_email=customer_email
-                )
-        except Exception as e:
-            print(f"⚠️ Analytics logging failed: {e}")
+        log_chat_turn(session_id, user_message, response, customer_email)
 
         return jsonify({
             'response': response,
             'session_id': session_id,
             'rag_sources': rag_sources,
-            'used_rag': used_rag
+            'used_rag': used_rag,
+            'intent': None
         })
 
     except Exception as e:
@@ -128,6 +278,7 @@ def chat():
 
 
 @api.route('/api/synthesize', methods=['POST'])
+@admission_controlled('synthesize')
 def synthesize():
     try:
         data = request.get_json()
@@ -209,20 +360,13 @@ def get_order(order_number):
 @api.route('/api/analytics', methods=['GET'])
 def get_analytics():
     try:
-        analytics = get_analytics_service()
-        if not analytics:
-            return jsonify({
-                'summary': {'total_conversations': 0, 'total_sessions': 0},
-                'recent_conversations': []
-            })
-        
-        summary = analytics.get_analytics_summary()
-        recent = analytics.get_recent_conversations(limit=5)
+        payload, etag = get_analytics_broadcaster().snapshot()
 
-        return jsonify({
-            'summary': summary,
-            'recent_conversations': recent
-        })
+        # Polling clients send If-None-Match and get a 304 when nothing changed
+        response = jsonify(payload)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
 
     except Exception as e:
         print(f"Analytics error: {e}")
@@ -232,6 +376,86 @@ def get_analytics():
         })
 
 
+@api.route('/api/analytics/stream', methods=['GET'])
+def stream_analytics():
+    stream = get_analytics_broadcaster().subscribe()
+    if stream is None:
+        # Every open stream holds a worker thread; past the cap, dashboards poll
+        return jsonify({'error': 'Too many live dashboards, poll /api/analytics instead'}), 503, \
+            {'Retry-After': '30'}
+
+    return Response(
+        stream,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'columns': 'application/x-ndjson'
+}
+
+
+@api.route('/api/export/conversations', methods=['GET'])
+def export_conversations():
+    # Dumps every transcript and customer email: only for holders of the export token
+    if not Config.EXPORT_API_TOKEN:
+        return jsonify({'error': 'Export endpoint is disabled (set EXPORT_API_TOKEN)'}), 404
+    auth = request.headers.get('Authorization', '')
+    token = auth[len('Bearer '):] if auth.startswith('Bearer ') else None
+    if not has_valid_token(Config.EXPORT_API_TOKEN, token):
+        return jsonify({'error': 'Unauthorized'}), 401, {'WWW-Authenticate': 'Bearer'}
+
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'format must be one of {", ".join(EXPORT_FORMATS)}'}), 400
+
+        analytics = get_analytics_service()
+        if not analytics:
+            return jsonify({'error': 'Analytics service not available'}), 503
+
+        start = request.args.get('start')
+        end = request.args.get('end')
+        fields = request.args.get('fields')
+
+        exporter = ConversationExporter(
+            analytics,
+            start=datetime.fromisoformat(start) if start else None,
+            end=datetime.fromisoformat(end) if end else None,
+            after=request.args.get('cursor'),
+            fields=fields.split(',') if fields else None,
+            batch_size=request.args.get('batch_size', 1000, type=int)
+        )
+
+        # Rows carry timestamp and _id; '<timestamp>_<_id>' of the last row
+        # received is the cursor to resume from.
+        return Response(
+            exporter.stream(export_format),
+            mimetype=EXPORT_MIMETYPES[export_format],
+            headers={
+                'Content-Disposition': f'attachment; filename=conversations.{"csv" if export_format == "csv" else "ndjson"}'
+            }
+        )
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@api.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    groq = current_app._groq if hasattr(current_app, '_groq') else None
+    return jsonify({
+        'coalescing': single_flight.stats(),
+        'model_routing': groq.router.stats() if groq else {},
+        'admission': get_admission_controller().stats()
+    })
+
+
 @api.route('/api/upload-doc', methods=['POST'])
 def upload_document():
     try:
@@ -250,14 +474,14 @@ def upload_document():
         if not rag_service:
             return jsonify({'error': 'RAG service not available'}), 500
 
-        success = rag_service.add_document(filepath)
+        # Parsing and embedding run in the background; poll the job for progress
+        job = get_ingestion_queue().submit_document(rag_service, filepath, file.filename)
 
-        if success:
-            return jsonify({
-                'message': f'Document {file.filename} added successfully!'
-            })
-        else:
-            return jsonify({'error': 'Failed to add document'}), 500
+        return jsonify({
+            'message': f'Document {file.filename} queued for ingestion',
+            'job_id': job.id,
+            'status_url': f'/api/ingest-jobs/{job.id}'
+        }), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -269,22 +493,33 @@ def reload_knowledge_base():
         rag_service = get_rag_service()
         if not rag_service:
             return jsonify({'error': 'RAG service not available'}), 500
-            
-        success = rag_service.reload_knowledge_base()
-        if success:
-            return jsonify({'message': 'Knowledge base reloaded!'})
-        else:
-            return jsonify({'error': 'Failed to reload'}), 500
+
+        job = get_ingestion_queue().submit_reload(rag_service)
+
+        return jsonify({
+            'message': 'Knowledge base reload queued',
+            'job_id': job.id,
+            'status_url': f'/api/ingest-jobs/{job.id}'
+        }), 202
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@api.route('/api/ingest-jobs/<job_id>', methods=['GET'])
+def get_ingest_job(job_id):
+    job = get_ingestion_queue().get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+
 @api.route('/api/reset', methods=['POST'])
 def reset_conversation():
     try:
+        data = request.get_json(silent=True) or {}
         groq = get_groq_service()
-        groq.reset_conversation()
+        groq.reset_conversation(data.get('session_id'))
         return jsonify({'message': 'Conversation reset successfully'})
 
     except Exception as e:
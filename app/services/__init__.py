@@ -1,6 +1,41 @@
-﻿from .deepgram_service import DeepgramService
-from .groq_service import GroqService
-from .analytics_service import AnalyticsService
-from .rag_service import RAGService
+﻿# Services are imported on first attribute access (PEP 562) so that importing
+# the package does not pull in LangChain, Chroma, Deepgram or Groq.
+# Names that match a submodule (e.g. the shared single_flight instance) can't
+# be exported this way: once the submodule is imported it shadows the
+# export, so import those from their module.
+import importlib
 
-__all__ = ['DeepgramService', 'GroqService', 'AnalyticsService', 'RAGService']
\ No newline at end of file
+_EXPORTS = {
+    'DeepgramService': '.deepgram_service',
+    'GroqService': '.groq_service',
+    'AnalyticsService': '.analytics_service',
+    'RAGService': '.rag_service',
+    'PromptBuilder': '.prompt_builder',
+    'IntentRouter': '.intent_router',
+    'SingleFlight': '.single_flight',
+    'CoalescingTimeout': '.single_flight',
+    'ModelRouter': '.model_router',
+    'CircuitBreaker': '.model_router',
+    'ModelUnavailableError': '.model_router',
+    'NumpyVectorIndex': '.vector_index',
+    'IngestionQueue': '.ingestion_service',
+    'IngestionJob': '.ingestion_service',
+    'AnalyticsBroadcaster': '.analytics_broadcaster',
+    'ConversationExporter': '.export_service',
+    'AdmissionController': '.admission_control',
+    'AdmissionRejected': '.admission_control',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,283 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+
+# Lower runs first
+PRIORITY_ACTIVE_SESSION = 0
+PRIORITY_NEW_SESSION = 1
+
+
+def limits_from_threads(threads, shares, max_wait, queue_fraction=1 / 3):
+    """
+    Split a worker's request threads into per-route limits
+
+    Each route gets int(threads * share) slots, queue_fraction of them for
+    waiting requests, so running plus queued requests across all routes
+    never exceed threads.
+
+    Returns:
+        dict of route -> (concurrency, max_queue, max_wait)
+    """
+    if sum(shares.values()) > 1:
+        raise ValueError("Admission shares add up to more than 1")
+
+    limits = {}
+    for route, share in shares.items():
+        slots = int(threads * share)
+        if slots < 1:
+            raise ValueError(f"{threads} request threads leave no slot for {route}; raise WEB_THREADS")
+        queue = int(slots * queue_fraction)
+        limits[route] = (slots - queue, queue, max_wait)
+    return limits
+
+
+class AdmissionRejected(Exception):
+    """Request shed by the admission controller"""
+
+    def __init__(self, reason, status=503, retry_after=1):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = max(int(math.ceil(retry_after)), 1)
+
+
+class _Waiter:
+    def __init__(self, priority, seq):
+        self.priority = priority
+        self.seq = seq
+        self.evicted = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Ticket:
+    """Held while an admitted request runs; releases its slot on exit"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.started = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release(time.monotonic() - self.started)
+        return False
+
+
+class RouteLimiter:
+    """Concurrency limit with a bounded, priority-ordered wait queue"""
+
+    def __init__(self, concurrency, max_queue, max_wait):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        # Moving average of service time, used to predict queue wait
+        self.avg_service = 1.0
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected_queue_full': 0,
+            'rejected_deadline': 0,
+            'rejected_timeout': 0,
+            'evicted': 0
+        }
+
+    def _estimated_wait(self, position):
+        return (position + 1) * self.avg_service / self.concurrency
+
+    def acquire(self, priority):
+        with self._cond:
+            if self.in_flight < self.concurrency and not self._queue:
+                self.in_flight += 1
+                self.stats['admitted'] += 1
+                return _Ticket(self)
+
+            waiter = _Waiter(priority, next(self._seq))
+
+            if len(self._queue) >= self.max_queue:
+                worst = max(self._queue)
+                if waiter < worst and worst.priority > priority:
+                    # Make room for the higher-priority request
+                    worst.evicted = True
+                    self._queue.remove(worst)
+                    heapq.heapify(self._queue)
+                    self.stats['evicted'] += 1
+                    self._cond.notify_all()
+                else:
+                    self.stats['rejected_queue_full'] += 1
+                    raise AdmissionRejected("Server busy, queue full",
+                                            retry_after=self._estimated_wait(len(self._queue)))
+
+            position = sum(1 for other in self._queue if other < waiter)
+            estimated = self._estimated_wait(position)
+            if estimated > self.max_wait:
+                # Would miss the deadline anyway: fail fast instead of queueing
+                self.stats['rejected_deadline'] += 1
+                raise AdmissionRejected("Server busy, try again shortly", retry_after=estimated)
+
+            heapq.heappush(self._queue, waiter)
+            self.stats['queued'] += 1
+            deadline = time.monotonic() + self.max_wait
+
+            while True:
+                if waiter.evicted:
+                    raise AdmissionRejected("Server busy, displaced by a priority request",
+                                            retry_after=self.avg_service)
+
+                if self._queue[0] is waiter and self.in_flight < self.concurrency:
+                    heapq.heappop(self._queue)
+                    self.in_flight += 1
+                    self.stats['admitted'] += 1
+                    # The next waiter may also fit
+                    self._cond.notify_all()
+                    return _Ticket(self)
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(waiter)
+                    heapq.heapify(self._queue)
+                    self.stats['rejected_timeout'] += 1
+                    self._cond.notify_all()
+                    raise AdmissionRejected("Server busy, timed out waiting",
+                                            retry_after=self.avg_service)
+                self._cond.wait(remaining)
+
+    def release(self, service_time):
+        with self._cond:
+            self.in_flight -= 1
+            self.avg_service = 0.8 * self.avg_service + 0.2 * service_time
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            return dict(
+                self.stats,
+                in_flight=self.in_flight,
+                queue_depth=len(self._queue),
+                avg_service_ms=round(self.avg_service * 1000, 1)
+            )
+
+
+class AdmissionController:
+    """Per-route concurrency limits, per-session rate limits and load shedding.
+
+    Requests from sessions seen in the last active_session_ttl seconds (an
+    in-progress voice conversation) queue ahead of new sessions. When the
+    predicted wait exceeds a route's max_wait the request is rejected
+    immediately with a Retry-After hint instead of timing out slowly.
+    """
+
+    def __init__(self, limits, session_rate=1.0, session_burst=5,
+                 rate_limited_routes=('chat',), active_session_ttl=120.0,
+                 max_sessions=10000):
+        self.limiters = {
+            route: RouteLimiter(concurrency, max_queue, max_wait)
+            for route, (concurrency, max_queue, max_wait) in limits.items()
+        }
+        self.session_rate = session_rate
+        self.session_burst = session_burst
+        self.rate_limited_routes = set(rate_limited_routes)
+        self.active_session_ttl = active_session_ttl
+        self.max_sessions = max_sessions
+
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._active = {}
+        self.rate_limited = 0
+
+    def touch(self, session_id):
+        """Mark a session as in progress"""
+        if not session_id:
+            return
+        with self._lock:
+            self._active[session_id] = time.monotonic()
+            if len(self._active) > self.max_sessions:
+                self._prune()
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.active_session_ttl
+        self._active = {sid: seen for sid, seen in self._active.items() if seen >= cutoff}
+        full_after = self.session_burst / self.session_rate
+        self._buckets = {
+            sid: bucket for sid, bucket in self._buckets.items()
+            if time.monotonic() - bucket[1] < full_after
+        }
+
+    def _priority(self, session_id):
+        seen = self._active.get(session_id) if session_id else None
+        if seen is not None and time.monotonic() - seen < self.active_session_ttl:
+            return PRIORITY_ACTIVE_SESSION
+        return PRIORITY_NEW_SESSION
+
+    def _check_rate(self, key):
+        """Token bucket per session (or client address); raises 429 when empty"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.session_burst, now))
+            tokens = min(self.session_burst, tokens + (now - updated) * self.session_rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self.rate_limited += 1
+                raise AdmissionRejected(
+                    "Too many requests for this session",
+                    status=429,
+                    retry_after=(1 - tokens) / self.session_rate
+                )
+            self._buckets[key] = (tokens - 1, now)
+            if len(self._buckets) > self.max_sessions:
+                self._prune()
+
+    def admit(self, route, session_id=None, client_id=None):
+        """
+        Admit a request or raise AdmissionRejected
+
+        Args:
+            session_id: Rate limit bucket and queue priority key
+            client_id: Client address, the rate limit bucket without a session
+
+        Returns:
+            context manager to hold for the duration of the request
+        """
+        if route in self.rate_limited_routes:
+            if session_id:
+                self._check_rate(session_id)
+            elif client_id:
+                self._check_rate(f"client:{client_id}")
+
+        with self._lock:
+            priority = self._priority(session_id)
+
+        limiter = self.limiters.get(route)
+        if limiter is None:
+            return _NullTicket()
+
+        ticket = limiter.acquire(priority)
+        self.touch(session_id)
+        return ticket
+
+    def stats(self):
+        with self._lock:
+            active_sessions = len(self._active)
+            rate_limited = self.rate_limited
+        return {
+            'routes': {route: limiter.snapshot() for route, limiter in self.limiters.items()},
+            'rate_limited': rate_limited,
+            'tracked_sessions': active_sessions
+        }
+
+
+class _NullTicket:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
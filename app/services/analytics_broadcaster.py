@@ -0,0 +1,162 @@
+import hashlib
+import json
+import queue
+import threading
+import time
+
+
+EMPTY_SUMMARY = {'total_conversations': 0, 'total_sessions': 0}
+
+
+class AnalyticsBroadcaster:
+    """Fan analytics updates out to every open dashboard from one place.
+
+    New conversations are pushed to subscribers as they are logged. The
+    summary is recomputed by a single background thread, at most once per
+    summary_interval and only when something changed, and subscribers get
+    just the fields that moved. Polling clients share one cached snapshot.
+
+    Only conversations logged by this process are seen, so run the app as
+    one multi-threaded worker (gunicorn gthread) for live dashboards. Each
+    open stream holds a worker thread, so at most max_subscribers streams
+    are accepted; further dashboards are expected to poll snapshot().
+    """
+
+    def __init__(self, analytics, recent_limit=5, summary_interval=2.0,
+                 snapshot_ttl=5.0, keepalive=15.0, max_queue=100, max_subscribers=None):
+        self.analytics = analytics
+        self.recent_limit = recent_limit
+        self.summary_interval = summary_interval
+        self.snapshot_ttl = snapshot_ttl
+        self.keepalive = keepalive
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._refresher = None
+
+        self.version = 0
+        self._snapshot = None
+        self._snapshot_version = -1
+        self._snapshot_at = 0.0
+        # Last summary pushed to subscribers; snapshot() may refresh the cache
+        # at any time, so deltas are computed against this instead
+        self._broadcast_summary = None
+
+    def _compute_snapshot(self):
+        if not self.analytics:
+            return {'summary': dict(EMPTY_SUMMARY), 'recent_conversations': []}
+        return {
+            'summary': self.analytics.get_analytics_summary(),
+            'recent_conversations': self.analytics.get_recent_conversations(limit=self.recent_limit)
+        }
+
+    def snapshot(self):
+        """
+        Current summary and recent conversations
+
+        Returns:
+            tuple of (payload dict, etag string)
+        """
+        with self._snapshot_lock:
+            fresh = time.monotonic() - self._snapshot_at < self.snapshot_ttl
+            if self._snapshot is None or self._snapshot_version != self.version or not fresh:
+                version = self.version
+                payload = self._compute_snapshot()
+                body = json.dumps(payload, sort_keys=True, default=str)
+                self._snapshot = (payload, hashlib.md5(body.encode('utf-8')).hexdigest())
+                self._snapshot_version = version
+                self._snapshot_at = time.monotonic()
+            return self._snapshot
+
+    def publish_conversation(self, conversation):
+        """Listener for AnalyticsService.log_conversation"""
+        with self._lock:
+            self.version += 1
+        self._publish('conversation', conversation)
+        self._dirty.set()
+        self._ensure_refresher()
+
+    def _publish(self, event, data):
+        message = f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Slow client: drop it, EventSource will reconnect and resync
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(None)
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def _ensure_refresher(self):
+        with self._lock:
+            if self._refresher is None or not self._refresher.is_alive():
+                self._refresher = threading.Thread(
+                    target=self._refresh_loop, name="analytics-broadcaster", daemon=True
+                )
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            self._dirty.wait()
+            # Coalesce bursts of conversations into one summary computation
+            time.sleep(self.summary_interval)
+            self._dirty.clear()
+
+            if not self._subscribers:
+                continue
+
+            try:
+                payload, _ = self.snapshot()
+            except Exception as e:
+                print(f"Error refreshing analytics summary: {e}")
+                continue
+
+            previous = self._broadcast_summary or {}
+            delta = {
+                key: value for key, value in payload['summary'].items()
+                if previous.get(key) != value
+            }
+            self._broadcast_summary = payload['summary']
+            if delta:
+                self._publish('summary', delta)
+
+    def subscribe(self):
+        """Generator of server-sent event messages for one client, or None when full"""
+        subscriber = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+
+        def stream():
+            try:
+                payload, _ = self.snapshot()
+                yield f"retry: 5000\nevent: snapshot\ndata: {json.dumps(payload, default=str)}\n\n"
+                while True:
+                    try:
+                        message = subscriber.get(timeout=self.keepalive)
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+                        continue
+                    if message is None:
+                        return
+                    yield message
+            finally:
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+
+        return stream()
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
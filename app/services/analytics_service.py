@@ -1,10 +1,26 @@
-﻿from pymongo import MongoClient
+﻿from pymongo import MongoClient, ASCENDING
 from datetime import datetime
 class AnalyticsService:
     def __init__(self, mongodb_uri, db_name):
         self.client = MongoClient(mongodb_uri)
         self.db = self.client[db_name]
         self.conversations = self.db.conversations
+        self.listeners = []
+    def ensure_indexes(self):
+        """Create the indexes exports rely on; run once at deploy time, not per request"""
+        self.conversations.create_index([('timestamp', ASCENDING), ('_id', ASCENDING)])
+    def add_listener(self, listener):
+        """Register a callable that receives each newly logged conversation"""
+        self.listeners.append(listener)
+    def _notify(self, conversation_log):
+        conversation = dict(conversation_log)
+        conversation['_id'] = str(conversation['_id'])
+        conversation['timestamp'] = conversation['timestamp'].isoformat()
+        for listener in self.listeners:
+            try:
+                listener(conversation)
+            except Exception as e:
+                print(f"Error notifying analytics listener: {e}")
     def log_conversation(self, session_id, user_input, bot_response, customer_email=None):
         try:
             conversation_log = {
@@ -17,6 +33,7 @@ class AnalyticsService:
                 'response_length': len(bot_response)
             }
             self.conversations.insert_one(conversation_log)
+            self._notify(conversation_log)
             return True
         except Exception as e:
             print(f"Error logging conversation: {e}")
@@ -71,3 +88,48 @@ class AnalyticsService:
         except Exception as e:
             print(f"Error fetching recent conversations: {e}")
             return []
+    def iter_conversations(self, start=None, end=None, after=None, fields=None, batch_size=1000):
+        """
+        Stream raw conversation documents ordered by (timestamp, _id)
+        
+        Args:
+            start, end: Optional datetime range (start inclusive, end exclusive)
+            after: Optional (timestamp, _id) to resume strictly after
+            fields: Optional list of fields to project (timestamp and _id are always kept)
+            batch_size: Documents fetched per round trip
+        
+        Uses the (timestamp, _id) index from ensure_indexes (a deploy step).
+        If that index is missing the sort spills to disk instead of failing
+        on MongoDB's in-memory sort limit.
+        """
+        query = {}
+        if start or end:
+            query['timestamp'] = {}
+            if start:
+                query['timestamp']['$gte'] = start
+            if end:
+                query['timestamp']['$lt'] = end
+        if after:
+            after_ts, after_id = after
+            resume = {'$or': [
+                {'timestamp': {'$gt': after_ts}},
+                {'timestamp': after_ts, '_id': {'$gt': after_id}}
+            ]}
+            query = {'$and': [query, resume]} if query else resume
+        
+        projection = None
+        if fields:
+            projection = {field: 1 for field in fields}
+            projection['timestamp'] = 1
+        
+        cursor = (
+            self.conversations.find(query, projection)
+            .sort([('timestamp', ASCENDING), ('_id', ASCENDING)])
+            .allow_disk_use(True)
+            .batch_size(batch_size)
+        )
+        try:
+            for conv in cursor:
+                yield conv
+        finally:
+            cursor.close()
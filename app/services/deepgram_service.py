@@ -1,8 +1,10 @@
 from deepgram import DeepgramClient, SpeakOptions, PrerecordedOptions, FileSource
+from app.services.single_flight import single_flight
 import base64
 class DeepgramService:
-    def __init__(self, api_key):
+    def __init__(self, api_key, coalesce_timeout=30):
         self.client = DeepgramClient(api_key)
+        self.coalesce_timeout = coalesce_timeout
     def transcribe_audio(self, audio_data):
         try:
             if isinstance(audio_data, str):
@@ -32,15 +34,24 @@ class DeepgramService:
                 encoding="linear16",
                 sample_rate=24000
             )
-            response = self.client.speak.v("1").save(
-                "output.wav",
-                {"text": text},
-                options
+            key = single_flight.make_key(
+                "tts", text, model=options.model, sample_rate=options.sample_rate
+            )
+            return single_flight.do(
+                key,
+                lambda: self._synthesize(text, options),
+                timeout=self.coalesce_timeout
             )
-            with open("output.wav", "rb") as audio_file:
-                audio_bytes = audio_file.read()
-            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-            return audio_base64
         except Exception as e:
             print(f"Error synthesizing speech: {e}")
             return None
+    def _synthesize(self, text, options):
+        # Synthesize into memory: a shared output file would let concurrent
+        # requests read back each other's audio
+        response = self.client.speak.v("1").stream(
+            {"text": text},
+            options
+        )
+        audio_bytes = response.stream.getvalue()
+        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+        return audio_base64
@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+
+EXPORT_FORMATS = ('ndjson', 'csv', 'columns')
+
+DEFAULT_FIELDS = [
+    '_id', 'session_id', 'timestamp', 'user_input', 'bot_response',
+    'customer_email', 'input_length', 'response_length'
+]
+
+
+def encode_cursor(timestamp, doc_id):
+    """Resume token for a row: '<ISO timestamp>_<_id>'"""
+    return f"{timestamp.isoformat()}_{doc_id}"
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; returns (datetime, ObjectId)"""
+    from bson import ObjectId
+    timestamp, doc_id = token.rsplit('_', 1)
+    return datetime.fromisoformat(timestamp), ObjectId(doc_id)
+
+
+class ConversationExporter:
+    """Stream conversation logs as NDJSON, CSV or columnar chunks.
+
+    Every format is a generator over a Mongo cursor, so memory stays flat
+    however many rows match. ``cursor`` always holds the resume token of
+    the last row produced; pass it back as ``after`` to continue.
+    """
+
+    def __init__(self, analytics, start=None, end=None, after=None,
+                 fields=None, batch_size=1000):
+        self.analytics = analytics
+        self.start = start
+        self.end = end
+        self.after = decode_cursor(after) if isinstance(after, str) else after
+        self.fields = list(fields or DEFAULT_FIELDS)
+        # Rows must carry what the resume cursor is built from
+        for required in ('timestamp', '_id'):
+            if required not in self.fields:
+                self.fields.insert(0, required)
+        self.batch_size = batch_size
+        self.cursor = None
+        self.rows_exported = 0
+
+    def documents(self):
+        """Raw documents (ObjectId/datetime values), updating the resume cursor"""
+        for conv in self.analytics.iter_conversations(
+            start=self.start,
+            end=self.end,
+            after=self.after,
+            fields=self.fields,
+            batch_size=self.batch_size
+        ):
+            self.cursor = encode_cursor(conv['timestamp'], conv['_id'])
+            self.rows_exported += 1
+            yield conv
+
+    def rows(self):
+        """Documents with JSON-friendly values, restricted to the export fields"""
+        for conv in self.documents():
+            row = {}
+            for field in self.fields:
+                value = conv.get(field)
+                if field == '_id':
+                    value = str(value)
+                elif isinstance(value, datetime):
+                    value = value.isoformat()
+                row[field] = value
+            yield row
+
+    def ndjson(self):
+        for row in self.rows():
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+
+    def csv(self):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fields)
+        writer.writeheader()
+        for row in self.rows():
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        # Header only when nothing matched
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def column_chunks(self, chunk_size=10000, raw=False):
+        """Dicts of field -> list of values, chunk_size rows at a time (Parquet row-group style)"""
+        source = self.documents() if raw else self.rows()
+        chunk = {field: [] for field in self.fields}
+        count = 0
+        for row in source:
+            for field in self.fields:
+                chunk[field].append(row.get(field))
+            count += 1
+            if count == chunk_size:
+                yield chunk
+                chunk = {field: [] for field in self.fields}
+                count = 0
+        if count:
+            yield chunk
+
+    def columns(self, chunk_size=10000):
+        """Column chunks serialized one JSON object per line"""
+        for chunk in self.column_chunks(chunk_size):
+            yield json.dumps(chunk, ensure_ascii=False) + "\n"
+
+    def stream(self, export_format):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        return getattr(self, export_format)()
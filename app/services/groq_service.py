@@ -1,12 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
 from groq import Groq
 from app.models import Customer, Order
+from app.services.prompt_builder import PromptBuilder
+from app.services.single_flight import single_flight
+from app.services.model_router import ModelRouter
+
+
+SYSTEM_PROMPT = """You are a helpful customer support agent for an e-commerce company. You help customers with:
+- Order status inquiries
+- Product information
+- Returns and refunds
+- General questions
+Be friendly, concise, and professional.
+"""
 
 
 class GroqService:
-    def __init__(self, api_key, model="llama-3.3-70b-versatile"):
-        self.client = Groq(api_key=api_key)
+    def __init__(self, api_key, model="llama-3.3-70b-versatile",
+                 prompt_builder=None, coalesce_timeout=30,
+                 fast_model="llama-3.1-8b-instant", latency_budget=8.0,
+                 hedge_delay=2.5, simple_query_max_chars=80,
+                 breaker_failures=5, breaker_reset=30.0, max_sessions=1000):
+        # Retries are handled by the router (hedging/fallback), not the SDK
+        self.client = Groq(api_key=api_key, timeout=latency_budget, max_retries=0)
         self.model = model
-        self.conversation_history = []
+        self.simple_query_max_chars = simple_query_max_chars
+        self.router = ModelRouter(
+            self.client,
+            primary_model=model,
+            fast_model=fast_model,
+            latency_budget=latency_budget,
+            hedge_delay=hedge_delay,
+            failure_threshold=breaker_failures,
+            reset_timeout=breaker_reset
+        )
+        self.coalesce_timeout = coalesce_timeout
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        # session_id -> {"history": [...], "summary": str}, least recently used first.
+        # Requests run on several threads, so all access goes through _lock.
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_session(self, session_id):
+        """Snapshot of a session's history and summary"""
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return [], ""
+            self._sessions.move_to_end(session_id)
+            return list(state["history"]), state["summary"]
+
+    def _touch(self, session_id):
+        """Mark a session most recently used and evict the oldest; caller holds _lock"""
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def _save_session(self, session_id, history, summary):
+        with self._lock:
+            self._sessions[session_id] = {"history": history, "summary": summary}
+            self._touch(session_id)
 
     def get_customer_context(self, customer_email=None, order_number=None):
         """Fetch customer and order information from database"""
@@ -35,58 +91,46 @@ class GroqService:
         return context
 
     def chat(self, user_message, customer_email=None,
-             order_number=None, rag_context=None):
-        """Process user message and generate response"""
+             order_number=None, rag_context=None, session_id=None, deadline=None):
+        """
+        Process user message and generate response
+        
+        deadline is an optional time.monotonic() shared with the rest of the
+        request (e.g. RAG), so the completion only gets the time that is left.
+        """
         try:
             db_context = self.get_customer_context(
                 customer_email, order_number
             )
 
-            system_prompt = """You are a helpful customer support agent for an e-commerce company. You help customers with:
-- Order status inquiries
-- Product information
-- Returns and refunds
-- General questions
-Be friendly, concise, and professional.
-"""
-
-            if rag_context:
-                system_prompt += f"""
-Use this knowledge base information to answer:
-{rag_context}
-
-Always cite your source when using this information.
-Example: According to our policy...
-"""
-
-            if db_context:
-                system_prompt += f"\n\nCustomer Information:\n{db_context}"
-
-            self.conversation_history.append({
-                "role": "user",
-                "content": user_message
-            })
-
-            messages = [
-                {"role": "system", "content": system_prompt}
-            ] + self.conversation_history
-
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500,
+            history, summary = self._get_session(session_id)
+            prompt = self.prompt_builder.build(
+                SYSTEM_PROMPT,
+                user_message,
+                history=history,
+                summary=summary,
+                customer_context=db_context,
+                rag_context=rag_context
             )
+            messages = prompt["messages"]
+            print(f"Prompt tokens (approx): {prompt['prompt_tokens']}")
 
-            assistant_message = response.choices[0].message.content
+            # Greetings and short follow-ups without extra context go to the fast model
+            simple = (
+                not rag_context and not db_context
+                and len(user_message) <= self.simple_query_max_chars
+            )
 
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": assistant_message
-            })
+            assistant_message = self._complete(
+                messages, temperature=0.7, max_tokens=500, simple=simple,
+                deadline=deadline
+            )
 
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
+            self._save_session(
+                session_id,
+                prompt["history"] + [{"role": "assistant", "content": assistant_message}],
+                prompt["summary"]
+            )
 
             return assistant_message
 
@@ -94,6 +138,40 @@ Example: According to our policy...
             print(f"Error in Groq chat: {e}")
             return "I apologize, but I'm having trouble processing your request. Please try again."
 
-    def reset_conversation(self):
-        """Clear conversation history"""
-        self.conversation_history = []
+    def _complete(self, messages, temperature, max_tokens, simple=False, deadline=None):
+        """Run a routed completion, sharing it with identical in-flight requests"""
+        def create():
+            return self.router.complete(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                simple=simple,
+                deadline=deadline
+            )
+
+        key = single_flight.make_key(
+            "groq", messages,
+            model=self.model, simple=simple,
+            temperature=temperature, max_tokens=max_tokens
+        )
+        # A waiter stops waiting at its own deadline, not the leader's
+        timeout = self.coalesce_timeout
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - time.monotonic(), 0))
+        content, _ = single_flight.do(key, create, timeout=timeout)
+        return content
+
+    def record_turn(self, user_message, assistant_message, session_id=None):
+        """Add a turn answered outside the LLM so later prompts still see it"""
+        with self._lock:
+            state = self._sessions.setdefault(session_id, {"history": [], "summary": ""})
+            state["history"] = state["history"] + [
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": assistant_message}
+            ]
+            self._touch(session_id)
+
+    def reset_conversation(self, session_id=None):
+        """Clear one session's history"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class IngestionJob:
+    def __init__(self, kind, filename=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.filename = filename
+        self.status = "queued"
+        self.stage = "queued"
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.timings = {}
+
+    def to_dict(self):
+        progress = 0.0
+        if self.status == "succeeded":
+            progress = 1.0
+        elif self.chunks_total:
+            progress = round(self.chunks_done / self.chunks_total, 3)
+
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'filename': self.filename,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': progress,
+            'chunks_total': self.chunks_total,
+            'chunks_done': self.chunks_done,
+            'error': self.error,
+            'timings_ms': dict(self.timings),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class IngestionQueue:
+    """Run document ingestion off the request path.
+
+    Jobs run on a small thread pool: parsing/splitting happens in parallel,
+    while indexing holds RAGService's index lock for the whole document, so
+    reloads and other documents never interleave with a half-written one.
+    Job state lives in this process only, so status polling must reach the
+    same worker that accepted the upload.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=200):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _register(self, job):
+        with self._lock:
+            self._jobs[job.id] = job
+            # Forget the oldest finished jobs once we hold too many
+            while len(self._jobs) > self.max_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.finished_at is None:
+                    break
+                self._jobs.pop(oldest_id)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit_document(self, rag_service, file_path, filename=None):
+        job = self._register(IngestionJob("document", filename or file_path))
+        self._executor.submit(self._run, job, self._ingest_document, rag_service, file_path)
+        return job
+
+    def submit_reload(self, rag_service):
+        job = self._register(IngestionJob("reload"))
+        self._executor.submit(self._run, job, self._reload, rag_service)
+        return job
+
+    def _run(self, job, work, *args):
+        job.status = "running"
+        job.started_at = time.time()
+        job.timings['queued'] = round((job.started_at - job.created_at) * 1000, 1)
+        try:
+            work(job, *args)
+            job.status = "succeeded"
+            job.stage = "done"
+        except Exception as e:
+            print(f"Ingestion job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job.timings['total'] = round((job.finished_at - job.started_at) * 1000, 1)
+
+    def _timed(self, job, stage, fn, *args, **kwargs):
+        job.stage = stage
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            job.timings[stage] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _ingest_document(self, job, rag_service, file_path):
+        # Lets index_chunks skip a file a reload has already picked up
+        source_mtime = os.path.getmtime(file_path)
+        chunks = self._timed(job, "parsing", rag_service.load_chunks, file_path)
+        if chunks is None:
+            raise ValueError("Unsupported file type (use .txt or .pdf)")
+        job.chunks_total = len(chunks)
+
+        def progress(done, total):
+            job.chunks_done = done
+
+        indexed = self._timed(
+            job, "indexing", rag_service.index_chunks, chunks,
+            progress=progress, source=file_path, source_mtime=source_mtime
+        )
+        if not indexed:
+            raise RuntimeError("Vector store not available")
+
+    def _reload(self, job, rag_service):
+        reloaded = self._timed(job, "rebuilding", rag_service.reload_knowledge_base)
+        if not reloaded:
+            raise RuntimeError("Failed to reload knowledge base")
@@ -0,0 +1,238 @@
+import math
+import re
+from collections import Counter
+from app.models import Customer, Order
+
+
+ORDER_NUMBER_PATTERN = re.compile(r"\bORD[-\s]?(\d+)\b", re.IGNORECASE)
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+# Seed utterances per intent; each intent's centroid is the mean of these
+INTENT_EXAMPLES = {
+    "order_status": [
+        "where is my order",
+        "what is the status of my order",
+        "has my order shipped yet",
+        "track my order",
+        "when will my order arrive",
+        "is my package delivered",
+        "order status for ORD-001",
+        "where is order ORD-002",
+        "what is the status of order ORD-003",
+        "has order ORD-001 been delivered",
+    ],
+    "order_amount": [
+        "how much did my order cost",
+        "what was the amount of my order",
+        "how much did I pay for order ORD-001",
+        "what is the total for my order",
+        "order price",
+        "what is the price of order ORD-004",
+    ],
+    "cancellation_window": [
+        "can I cancel my order",
+        "how long do I have to cancel an order",
+        "what is the cancellation policy",
+        "how do I cancel my order",
+        "cancel order within how many hours",
+        "what is your cancellation policy",
+        "cancellation window",
+    ],
+    "other": [
+        "what is your return policy",
+        "what is the return policy for my order",
+        "I want to return my order",
+        "I want a refund for my order",
+        "when will I get my refund",
+        "my order arrived damaged",
+        "my product arrived damaged I want a refund",
+        "my order arrived broken",
+        "I received the wrong item in my order",
+        "does my order have a warranty",
+        "how does the warranty work",
+        "can I change the shipping address on my order",
+        "I want to exchange my order",
+        "do you ship internationally",
+        "I want to talk to a human",
+        "what payment methods do you accept",
+        "I forgot my password",
+        "hello",
+        "thank you",
+    ],
+}
+
+# A structured intent is only answered when the message also contains one of
+# its keywords, so a message that merely looks like an order question by
+# trigram overlap ("...my order...") still goes to the LLM.
+INTENT_KEYWORDS = {
+    "order_status": re.compile(
+        r"\b(status|track\w*|where|arriv\w*|ship(ped|ping)?|deliver\w*)\b", re.IGNORECASE
+    ),
+    "order_amount": re.compile(
+        r"\b(cost|costs|pay|paid|total|amount|price|charged|how much)\b", re.IGNORECASE
+    ),
+    "cancellation_window": re.compile(r"\bcancel\w*\b", re.IGNORECASE),
+}
+
+# Topics the fast path never answers, whatever the classifier says
+FALLBACK_KEYWORDS = re.compile(
+    r"\b(return\w*|refund\w*|damaged?|broken|defective|warranty|address|exchange\w*|wrong)\b",
+    re.IGNORECASE
+)
+
+
+class IntentRouter:
+    """Answer high-confidence structured intents without calling the LLM.
+
+    Order numbers and emails are pulled out with regexes and the intent is
+    picked by a nearest-centroid classifier over character trigram vectors,
+    which keeps a routing decision well under a millisecond. Trigram overlap
+    alone is a weak signal, so a match must also clear the score threshold
+    and margin, contain one of the intent's keywords and avoid the fallback
+    topics (returns, refunds, damage...); anything else goes to the LLM.
+    """
+
+    def __init__(self, faq_path="knowledge_base/docs/company_faq.txt",
+                 confidence_threshold=0.5, margin=0.1):
+        self.confidence_threshold = confidence_threshold
+        self.margin = margin
+        self.centroids = {
+            intent: self._centroid([self._embed(text) for text in examples])
+            for intent, examples in INTENT_EXAMPLES.items()
+        }
+        self.cancellation_policy = self._load_faq_section(faq_path, "ORDER CANCELLATION")
+
+    def _embed(self, text):
+        """Sparse vector of character trigram counts over normalized words"""
+        text = ORDER_NUMBER_PATTERN.sub(" ordnum ", text.lower())
+        text = EMAIL_PATTERN.sub(" email ", text)
+        text = " ".join(re.findall(r"[a-z]+", text))
+        padded = f" {text} "
+        vector = Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {gram: count / norm for gram, count in vector.items()}
+
+    def _centroid(self, vectors):
+        centroid = Counter()
+        for vector in vectors:
+            centroid.update(vector)
+        norm = math.sqrt(sum(v * v for v in centroid.values())) or 1.0
+        return {gram: value / norm for gram, value in centroid.items()}
+
+    def _load_faq_section(self, faq_path, heading):
+        """Return the bullet lines under a FAQ heading, or [] if unavailable"""
+        try:
+            with open(faq_path, encoding="utf-8") as faq_file:
+                lines = faq_file.read().splitlines()
+        except OSError:
+            return []
+
+        section = []
+        in_section = False
+        for line in lines:
+            stripped = line.strip()
+            if stripped.rstrip(":").upper() == heading:
+                in_section = True
+            elif in_section and stripped.startswith("-"):
+                section.append(stripped.lstrip("- ").strip())
+            elif in_section and stripped:
+                break
+        return section
+
+    def classify(self, text):
+        """Return (intent, confidence) for the closest centroid"""
+        vector = self._embed(text)
+        scores = sorted(
+            (
+                (sum(value * centroid.get(gram, 0.0) for gram, value in vector.items()), intent)
+                for intent, centroid in self.centroids.items()
+            ),
+            reverse=True
+        )
+        best_score, best_intent = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+
+        if best_score < self.confidence_threshold or best_score - runner_up < self.margin:
+            return None, best_score
+
+        keywords = INTENT_KEYWORDS.get(best_intent)
+        if keywords and (not keywords.search(text) or FALLBACK_KEYWORDS.search(text)):
+            return None, best_score
+        return best_intent, best_score
+
+    def extract_entities(self, text, customer_email=None, order_number=None):
+        """Prefer entities mentioned in the message over the form fields"""
+        order_match = ORDER_NUMBER_PATTERN.search(text)
+        email_match = EMAIL_PATTERN.search(text)
+        return {
+            "order_number": f"ORD-{order_match.group(1).zfill(3)}" if order_match else order_number,
+            "customer_email": email_match.group(0).lower() if email_match else customer_email,
+        }
+
+    def route(self, user_message, customer_email=None, order_number=None):
+        """
+        Try to answer a message from structured data
+
+        Returns:
+            dict with response and intent, or None to fall back to the LLM
+        """
+        try:
+            intent, confidence = self.classify(user_message)
+            if intent is None or intent == "other":
+                return None
+
+            entities = self.extract_entities(user_message, customer_email, order_number)
+
+            if intent == "cancellation_window":
+                response = self._answer_cancellation()
+            else:
+                response = self._answer_order(intent, **entities)
+
+            if response is None:
+                return None
+
+            return {
+                "response": response,
+                "intent": intent,
+                "confidence": round(confidence, 3)
+            }
+
+        except Exception as e:
+            print(f"Error in intent routing: {e}")
+            return None
+
+    def _find_orders(self, order_number=None, customer_email=None):
+        if order_number:
+            order = Order.query.filter_by(order_number=order_number.upper()).first()
+            return [order] if order else []
+        if customer_email:
+            customer = Customer.query.filter_by(email=customer_email).first()
+            if customer:
+                return Order.query.filter_by(customer_id=customer.id).all()
+        return []
+
+    def _answer_order(self, intent, order_number=None, customer_email=None):
+        orders = self._find_orders(order_number, customer_email)
+        if not orders:
+            # Nothing to look up, or an unknown order: let the LLM ask for details
+            return None
+
+        if intent == "order_status":
+            lines = [
+                f"Order #{order.order_number} ({order.product_name}) is currently {order.status}."
+                for order in orders
+            ]
+        else:
+            lines = [
+                f"Order #{order.order_number} ({order.product_name}) came to ${order.amount:.2f}."
+                for order in orders
+            ]
+
+        return " ".join(lines) + " Is there anything else I can help you with?"
+
+    def _answer_cancellation(self):
+        if not self.cancellation_policy:
+            return None
+        policy = ". ".join(self.cancellation_policy)
+        return f"According to our policy: {policy}."
+
@@ -0,0 +1,199 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class ModelUnavailableError(Exception):
+    """Raised when no model produced an answer within the latency budget"""
+
+
+class CircuitBreaker:
+    """Stop calling a model after repeated failures, retry after a cool-down"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        return self.state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed half-open probe re-opens the breaker for another cool-down
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+class ModelRouter:
+    """Route completions across a primary and a fast model under a latency budget.
+
+    Simple queries go to the fast model. Otherwise the primary model is
+    tried first and, if it has not answered after hedge_delay seconds, the
+    fast model is fired too; whichever finishes first wins. Each model has
+    its own circuit breaker, and every request is bounded by the budget.
+    """
+
+    def __init__(self, client, primary_model, fast_model, latency_budget=8.0,
+                 hedge_delay=2.5, failure_threshold=5, reset_timeout=30.0,
+                 max_workers=16):
+        self.client = client
+        self.primary_model = primary_model
+        self.fast_model = fast_model
+        self.latency_budget = latency_budget
+        self.hedge_delay = hedge_delay
+        self.breakers = {
+            model: CircuitBreaker(failure_threshold, reset_timeout)
+            for model in {primary_model, fast_model}
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'routed_fast': 0,
+            'hedges_fired': 0,
+            'hedge_wins': 0,
+            'budget_exceeded': 0,
+            'by_model': {
+                model: {'attempts': 0, 'successes': 0, 'failures': 0}
+                for model in self.breakers
+            }
+        }
+
+    def _count(self, *path):
+        with self._lock:
+            node = self._stats
+            for part in path[:-1]:
+                node = node[part]
+            node[path[-1]] += 1
+
+    def _call(self, model, messages, temperature, max_tokens, timeout):
+        self._count('by_model', model, 'attempts')
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+            )
+            content = response.choices[0].message.content
+        except Exception:
+            self.breakers[model].record_failure()
+            self._count('by_model', model, 'failures')
+            raise
+        self.breakers[model].record_success()
+        self._count('by_model', model, 'successes')
+        return content
+
+    def _plan(self, simple):
+        """Pick the first model and the hedge model, skipping open breakers"""
+        preferred = [self.fast_model, self.primary_model] if simple \
+            else [self.primary_model, self.fast_model]
+        available = [model for model in preferred if self.breakers[model].allow()]
+        if not available:
+            return None, None
+        first = available[0]
+        hedge = next((model for model in available[1:] if model != first), None)
+        return first, hedge
+
+    def complete(self, messages, temperature=0.7, max_tokens=500, simple=False,
+                 deadline=None):
+        """
+        Run a completion within the latency budget
+
+        Args:
+            messages: Chat messages
+            simple: Route to the fast model first
+            deadline: Optional time.monotonic() by which the caller needs an
+                answer; the budget is cut short to meet it
+
+        Returns:
+            tuple of (content, model that answered)
+        """
+        self._count('requests')
+        budget_deadline = time.monotonic() + self.latency_budget
+        deadline = budget_deadline if deadline is None else min(deadline, budget_deadline)
+
+        first, hedge = self._plan(simple)
+        if first is None:
+            raise ModelUnavailableError("All model circuit breakers are open")
+        if first == self.fast_model:
+            self._count('routed_fast')
+
+        def submit(model):
+            timeout = max(deadline - time.monotonic(), 0.1)
+            future = self._executor.submit(
+                self._call, model, messages, temperature, max_tokens, timeout
+            )
+            pending[future] = model
+            return future
+
+        pending = {}
+        submit(first)
+        hedged = False
+        last_error = None
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # Wake up at the hedge point if we have not hedged yet
+            wait_for = remaining
+            if hedge and not hedged:
+                wait_for = min(remaining, self.hedge_delay)
+
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                model = pending.pop(future)
+                try:
+                    content = future.result()
+                except Exception as e:
+                    print(f"Model {model} failed: {e}")
+                    last_error = e
+                    continue
+                if hedged and model == hedge:
+                    self._count('hedge_wins')
+                return content, model
+
+            # Fire the hedge on a slow or failed first attempt
+            if hedge and not hedged and (not done or not pending):
+                if self.breakers[hedge].allow():
+                    self._count('hedges_fired')
+                    submit(hedge)
+                hedged = True
+
+        if not pending and last_error is not None:
+            raise ModelUnavailableError(f"All models failed (last error: {last_error})")
+
+        self._count('budget_exceeded')
+        raise ModelUnavailableError("No model answered within the latency budget")
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                key: value for key, value in self._stats.items() if key != 'by_model'
+            }
+            stats['by_model'] = {
+                model: dict(values, breaker=self.breakers[model].state)
+                for model, values in self._stats['by_model'].items()
+            }
+            return stats
@@ -0,0 +1,48 @@
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from app.services.vector_index import NumpyVectorIndex
+
+
+class NumpyRetriever(BaseRetriever):
+    """LangChain retriever over a NumpyVectorIndex"""
+
+    index: NumpyVectorIndex
+    embeddings: object
+    k: int = 3
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        query_vector = self.embeddings.embed_query(query)
+        return [
+            Document(page_content=text, metadata=metadata)
+            for text, metadata, _ in self.index.search(query_vector, self.k)
+        ]
+
+
+class NumpyVectorStore:
+    """Chroma-compatible wrapper (the subset RAGService uses) around NumpyVectorIndex"""
+
+    def __init__(self, persist_directory, embedding_function, dtype="float32"):
+        self.index = NumpyVectorIndex(persist_directory, dtype=dtype)
+        self.embeddings = embedding_function
+
+    @classmethod
+    def from_documents(cls, documents, embedding, persist_directory, dtype="float32"):
+        store = cls(persist_directory, embedding, dtype=dtype)
+        store.add_documents(documents)
+        return store
+
+    def add_documents(self, documents):
+        texts = [doc.page_content for doc in documents]
+        vectors = self.embeddings.embed_documents(texts)
+        self.index.add(vectors, texts, [doc.metadata for doc in documents])
+
+    def persist(self):
+        # NumpyVectorIndex writes through on every add
+        pass
+
+    def as_retriever(self, search_kwargs=None):
+        k = (search_kwargs or {}).get("k", 3)
+        return NumpyRetriever(index=self.index, embeddings=self.embeddings, k=k)
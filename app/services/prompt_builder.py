@@ -0,0 +1,167 @@
+import math
+import re
+
+
+class PromptBuilder:
+    """Assemble chat prompts under a fixed per-turn token budget.
+
+    The budget is shared between the system prompt, customer context,
+    retrieved knowledge, a running summary of older turns and the most
+    recent history. Turns that no longer fit are folded into the summary
+    instead of being dropped.
+
+    Section budgets are upper bounds: each is clamped to what is left of
+    token_budget after the system prompt and the sections before it
+    (message, customer context, knowledge, summary), so the assembled
+    prompt never exceeds token_budget.
+    """
+
+    # Rough chat-format overhead per message (role markers, separators)
+    MESSAGE_OVERHEAD = 4
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, token_budget=1500, context_budget=250, rag_budget=400,
+                 summary_budget=200, message_budget=300):
+        self.token_budget = token_budget
+        self.context_budget = context_budget
+        self.rag_budget = rag_budget
+        self.summary_budget = summary_budget
+        self.message_budget = message_budget
+
+    def count_tokens(self, text):
+        """Approximate token count (~4 characters per token for English)"""
+        if not text:
+            return 0
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+    def count_message_tokens(self, messages):
+        return sum(
+            self.count_tokens(message["content"]) + self.MESSAGE_OVERHEAD
+            for message in messages
+        )
+
+    def truncate(self, text, max_tokens):
+        """Cut text down to max_tokens, preferring a word boundary"""
+        if not text or self.count_tokens(text) <= max_tokens:
+            return text
+        # Leave room for the ellipsis so the result stays within max_tokens
+        max_chars = max_tokens * self.CHARS_PER_TOKEN - 3
+        if max_chars <= 0:
+            return ""
+        cut = text[:max_chars]
+        if " " in cut[-40:]:
+            cut = cut[:cut.rfind(" ")]
+        return cut.rstrip() + "..."
+
+    def summarize_turn(self, message):
+        """Compress one turn to its first sentence for the running summary"""
+        content = " ".join(message["content"].split())
+        sentence = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+        speaker = "Customer" if message["role"] == "user" else "Agent"
+        return f"{speaker}: {self.truncate(sentence, 40)}"
+
+    def compact_summary(self, summary, messages, max_tokens=None):
+        """Fold older messages into the running summary, keeping it in budget"""
+        if max_tokens is None:
+            max_tokens = self.summary_budget
+        lines = summary.splitlines() if summary else []
+        lines.extend(self.summarize_turn(message) for message in messages)
+
+        # Oldest summary lines go first when the summary itself overflows
+        while lines and self.count_tokens("\n".join(lines)) > max_tokens:
+            lines.pop(0)
+
+        return "\n".join(lines)
+
+    def build(self, system_prompt, user_message, history=None, summary="",
+              customer_context="", rag_context=""):
+        """
+        Build the message list for one turn
+
+        Args:
+            system_prompt: Base instructions, always included in full
+            user_message: Current user message
+            history: Previous user/assistant messages, oldest first
+            summary: Running summary of turns already compacted
+            customer_context: Customer/order details from the database
+            rag_context: Retrieved knowledge base answer
+
+        Returns:
+            dict with messages, the history and summary to keep for the
+            next turn, and the prompt token count
+        """
+        history = list(history or [])
+
+        rag_prefix = "\nUse this knowledge base information to answer:\n"
+        rag_suffix = """
+
+Always cite your source when using this information.
+Example: According to our policy...
+"""
+        context_prefix = "\n\nCustomer Information:\n"
+        summary_prefix = "\n\nEarlier in this conversation:\n"
+
+        # What is left once the system prompt and message overheads are paid
+        available = self.token_budget - self.count_message_tokens([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": ""}
+        ])
+        if available <= 0:
+            raise ValueError(
+                f"System prompt alone exceeds the {self.token_budget}-token budget"
+            )
+
+        user_content = self.truncate(user_message, min(self.message_budget, available))
+        user_entry = {"role": "user", "content": user_content}
+        available -= self.count_tokens(user_content)
+
+        # Customer details take priority over retrieved knowledge for the budget
+        context_text = ""
+        if customer_context:
+            overhead = self.count_tokens(context_prefix)
+            context_text = self.truncate(
+                customer_context, min(self.context_budget, available - overhead)
+            )
+            if context_text:
+                available -= overhead + self.count_tokens(context_text)
+
+        system_content = system_prompt
+
+        if rag_context:
+            overhead = self.count_tokens(rag_prefix) + self.count_tokens(rag_suffix)
+            rag_text = self.truncate(rag_context, min(self.rag_budget, available - overhead))
+            if rag_text:
+                system_content += f"{rag_prefix}{rag_text}{rag_suffix}"
+                available -= overhead + self.count_tokens(rag_text)
+
+        if context_text:
+            system_content += f"{context_prefix}{context_text}"
+
+        # Reserve room for the summary before filling in recent turns
+        summary_overhead = self.count_tokens(summary_prefix)
+        summary_budget = max(min(self.summary_budget, available - summary_overhead), 0)
+        remaining = available - (summary_budget + summary_overhead if summary_budget else 0)
+
+        kept = []
+        for message in reversed(history):
+            cost = self.count_message_tokens([message])
+            if cost > remaining:
+                break
+            kept.insert(0, message)
+            remaining -= cost
+
+        overflow = history[:len(history) - len(kept)]
+        if overflow or self.count_tokens(summary) > summary_budget:
+            summary = self.compact_summary(summary, overflow, max_tokens=summary_budget)
+
+        if summary:
+            system_content += f"{summary_prefix}{summary}"
+
+        messages = [{"role": "system", "content": system_content}] + kept + [user_entry]
+
+        return {
+            "messages": messages,
+            "history": kept + [user_entry],
+            "summary": summary,
+            "prompt_tokens": self.count_message_tokens(messages)
+        }
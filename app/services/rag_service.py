@@ -1,16 +1,34 @@
-from langchain_community.document_loaders import TextLoader, DirectoryLoader, PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.chains import RetrievalQA
-from langchain_groq import ChatGroq
+from app.services.single_flight import single_flight
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import os
+import shutil
+import threading
+import time
+
+# LangChain, Chroma and the vector backends are imported inside the methods
+# that use them, so importing this module stays cheap until RAG is used.
 
 class RAGService:
-    def __init__(self, groq_api_key, docs_path="knowledge_base/docs", db_path="chroma_db"):
+    # db_path/CURRENT names the live index version directory. Reloads build
+    # a new version next to it and swap, so queries never see a half-built
+    # index. Without CURRENT (older layouts) db_path itself is the index.
+    CURRENT_FILE = "CURRENT"
+    
+    def __init__(self, groq_api_key, docs_path="knowledge_base/docs", db_path="chroma_db",
+                 coalesce_timeout=30, model="llama-3.3-70b-versatile",
+                 request_timeout=8.0, vector_backend="chroma", vector_dtype="float32",
+                 max_workers=8):
+        """vector_backend is "chroma" or "numpy" (memory-mapped NumpyVectorIndex)"""
+        if vector_backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector backend: {vector_backend}")
         self.groq_api_key = groq_api_key
+        self.model = model
+        self.request_timeout = request_timeout
         self.docs_path = docs_path
         self.db_path = db_path
+        self.vector_backend = vector_backend
+        self.vector_dtype = vector_dtype
+        self.coalesce_timeout = coalesce_timeout
         
         # Lazy loading - don't initialize these at startup
         self._embeddings = None
@@ -18,12 +36,21 @@ class RAGService:
         self._qa_chain = None
         self._llm = None
         
+        # Serializes index writes (add/reload) and lazy initialization;
+        # reentrant because writers go through the lazy properties
+        self._index_lock = threading.RLock()
+        # Document path -> mtime of the version already in the index
+        self._indexed_files = {}
+        # Runs chain calls so a caller can stop waiting at its deadline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        
         print("RAGService initialized (lazy loading enabled)")
     
     @property
     def embeddings(self):
         """Lazy load embeddings only when first needed"""
         if self._embeddings is None:
+            from langchain_community.embeddings import HuggingFaceEmbeddings
             print("Loading embeddings model (on-demand)...")
             self._embeddings = HuggingFaceEmbeddings(
                 model_name="all-MiniLM-L6-v2",
@@ -36,12 +63,15 @@ class RAGService:
     def llm(self):
         """Lazy load LLM only when first needed"""
         if self._llm is None:
+            from langchain_groq import ChatGroq
             print("Initializing LLM...")
             self._llm = ChatGroq(
                 groq_api_key=self.groq_api_key,
-                model_name="llama-3.3-70b-versatile",
+                model_name=self.model,
                 temperature=0.3,
-                max_tokens=500
+                max_tokens=500,
+                request_timeout=self.request_timeout,
+                max_retries=0
             )
         return self._llm
     
@@ -49,115 +79,207 @@ class RAGService:
     def vectorstore(self):
         """Lazy load vectorstore only when first needed"""
         if self._vectorstore is None:
-            self._initialize_vectorstore()
+            with self._index_lock:
+                if self._vectorstore is None:
+                    self._initialize_vectorstore()
         return self._vectorstore
     
     @property
     def qa_chain(self):
         """Lazy load QA chain only when first needed"""
         if self._qa_chain is None:
-            self._create_qa_chain()
+            with self._index_lock:
+                if self._qa_chain is None and self.vectorstore is not None:
+                    self._qa_chain = self._create_qa_chain(self._vectorstore)
         return self._qa_chain
     
+    def _store_path(self):
+        """Directory of the live index"""
+        try:
+            with open(os.path.join(self.db_path, self.CURRENT_FILE), encoding="utf-8") as f:
+                return os.path.join(self.db_path, f.read().strip())
+        except OSError:
+            return self.db_path
+    
+    def _open_vectorstore(self, path):
+        if self.vector_backend == "numpy":
+            from app.services.numpy_vectorstore import NumpyVectorStore
+            return NumpyVectorStore(
+                persist_directory=path,
+                embedding_function=self.embeddings,
+                dtype=self.vector_dtype
+            )
+        from langchain_community.vectorstores import Chroma
+        return Chroma(
+            persist_directory=path,
+            embedding_function=self.embeddings
+        )
+    
+    def _store_exists(self, path):
+        """Whether path holds an index for the configured backend"""
+        if self.vector_backend == "numpy":
+            from app.services.vector_index import NumpyVectorIndex
+            return NumpyVectorIndex(path, dtype=self.vector_dtype).exists()
+        return os.path.isdir(path) and any(
+            entry != self.CURRENT_FILE for entry in os.listdir(path)
+        )
+    
     def _initialize_vectorstore(self):
-        """Load existing vectorstore or create new one"""
+        """Load existing vectorstore or create new one; caller holds _index_lock"""
         try:
-            if os.path.exists(self.db_path) and os.listdir(self.db_path):
+            path = self._store_path()
+            if self._store_exists(path):
                 print("Loading existing knowledge base...")
-                self._vectorstore = Chroma(
-                    persist_directory=self.db_path,
-                    embedding_function=self.embeddings
-                )
+                self._vectorstore = self._open_vectorstore(path)
                 print("Knowledge base loaded!")
             else:
                 print("Creating new knowledge base...")
-                self._create_vectorstore()
+                self._rebuild()
             
         except Exception as e:
             print(f"Error initializing vectorstore: {e}")
     
-    def _create_vectorstore(self):
-        """Create vector store from documents"""
-        try:
-            # Load documents
-            documents = []
-            
-            # Load text files
-            if os.path.exists(self.docs_path):
-                for filename in os.listdir(self.docs_path):
-                    filepath = os.path.join(self.docs_path, filename)
-                    
-                    if filename.endswith('.txt'):
-                        loader = TextLoader(filepath, encoding='utf-8')
-                        documents.extend(loader.load())
-                    elif filename.endswith('.pdf'):
-                        loader = PyPDFLoader(filepath)
-                        documents.extend(loader.load())
-            
-            if not documents:
-                print("No documents found!")
-                return
-            
-            print(f"Loaded {len(documents)} documents")
-            
-            # Split documents
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=500,
-                chunk_overlap=50
+    def _build_vectorstore(self, path):
+        """
+        Build a vector store at path from the documents in docs_path
+        
+        Returns:
+            tuple of (vectorstore or None, {document path: mtime indexed})
+        """
+        from langchain_community.document_loaders import TextLoader, PyPDFLoader
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        
+        # Load documents
+        documents = []
+        indexed_files = {}
+        
+        # Load text files
+        if os.path.exists(self.docs_path):
+            for filename in os.listdir(self.docs_path):
+                filepath = os.path.join(self.docs_path, filename)
+                
+                if filename.endswith('.txt'):
+                    loader = TextLoader(filepath, encoding='utf-8')
+                elif filename.endswith('.pdf'):
+                    loader = PyPDFLoader(filepath)
+                else:
+                    continue
+                indexed_files[os.path.abspath(filepath)] = os.path.getmtime(filepath)
+                documents.extend(loader.load())
+        
+        if not documents:
+            print("No documents found!")
+            return None, {}
+        
+        print(f"Loaded {len(documents)} documents")
+        
+        # Split documents
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=500,
+            chunk_overlap=50
+        )
+        chunks = text_splitter.split_documents(documents)
+        print(f"Created {len(chunks)} chunks")
+        
+        # Create vector store
+        if self.vector_backend == "numpy":
+            from app.services.numpy_vectorstore import NumpyVectorStore
+            vectorstore = NumpyVectorStore.from_documents(
+                documents=chunks,
+                embedding=self.embeddings,
+                persist_directory=path,
+                dtype=self.vector_dtype
             )
-            chunks = text_splitter.split_documents(documents)
-            print(f"Created {len(chunks)} chunks")
-            
-            # Create vector store
-            self._vectorstore = Chroma.from_documents(
+        else:
+            from langchain_community.vectorstores import Chroma
+            vectorstore = Chroma.from_documents(
                 documents=chunks,
                 embedding=self.embeddings,
-                persist_directory=self.db_path
+                persist_directory=path
             )
-            self._vectorstore.persist()
-            print("Knowledge base created and saved!")
-            
-        except Exception as e:
-            print(f"Error creating vectorstore: {e}")
+        vectorstore.persist()
+        return vectorstore, indexed_files
     
-    def _create_qa_chain(self):
-        """Create QA retrieval chain"""
+    def _rebuild(self):
+        """
+        Build a new index version and swap it in; caller holds _index_lock
+        
+        Queries keep using the current store and chain until the swap.
+        """
+        version = f"v{int(time.time() * 1000)}"
+        path = os.path.join(self.db_path, version)
         try:
-            if self._vectorstore is None:
-                self._initialize_vectorstore()
-            
-            if self._vectorstore is None:
-                return
+            vectorstore, indexed_files = self._build_vectorstore(path)
+            qa_chain = self._create_qa_chain(vectorstore) if vectorstore else None
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        if vectorstore is None:
+            shutil.rmtree(path, ignore_errors=True)
+            return False
+        
+        # Point CURRENT at the new version atomically, then swap in memory
+        pointer = os.path.join(self.db_path, self.CURRENT_FILE)
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer + ".tmp", pointer)
+        self._vectorstore = vectorstore
+        self._qa_chain = qa_chain
+        self._indexed_files = indexed_files
+        print("Knowledge base created and saved!")
+        
+        # Old versions (and a pre-versioning index) are no longer referenced
+        for entry in os.listdir(self.db_path):
+            if entry in (version, self.CURRENT_FILE):
+                continue
+            old = os.path.join(self.db_path, entry)
+            if os.path.isdir(old):
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.remove(old)
+        return True
+    
+    def _create_qa_chain(self, vectorstore):
+        """Create QA retrieval chain over vectorstore; returns None on failure"""
+        try:
+            from langchain.chains import RetrievalQA
             
-            retriever = self._vectorstore.as_retriever(
+            retriever = vectorstore.as_retriever(
                 search_kwargs={"k": 3}
             )
             
-            self._qa_chain = RetrievalQA.from_chain_type(
+            qa_chain = RetrievalQA.from_chain_type(
                 llm=self.llm,
                 chain_type="stuff",
                 retriever=retriever,
                 return_source_documents=True
             )
             print("QA chain ready!")
+            return qa_chain
             
         except Exception as e:
             print(f"Error creating QA chain: {e}")
+            return None
     
-    def query(self, question, customer_context=""):
+    def query(self, question, customer_context="", deadline=None):
         """
         Query the RAG system
         
         Args:
             question: User's question
             customer_context: Optional customer data context
+            deadline: Optional time.monotonic() after which the caller stops
+                waiting and gets no RAG answer (the call itself still finishes
+                in the background for any coalesced requests)
             
         Returns:
             dict with answer and sources
         """
         try:
-            # This will trigger lazy loading on first use
-            if self.qa_chain is None:
+            # This will trigger lazy loading on first use; keep a reference
+            # so a concurrent reload swapping the chain does not affect us
+            qa_chain = self.qa_chain
+            if qa_chain is None:
                 return {
                     "answer": "Knowledge base not available.",
                     "sources": [],
@@ -169,8 +291,24 @@ class RAGService:
             if customer_context:
                 full_question = f"{question}\n\nCustomer Context: {customer_context}"
             
-            # Query the chain
-            result = self.qa_chain({"query": full_question})
+            # Query the chain (identical concurrent questions share one call)
+            key = single_flight.make_key("rag", full_question, k=3)
+            future = self._executor.submit(
+                single_flight.do,
+                key,
+                lambda: qa_chain({"query": full_question}),
+                self.coalesce_timeout
+            )
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                result = future.result(timeout=timeout)
+            except FutureTimeout:
+                print("RAG query ran past the request deadline")
+                return {
+                    "answer": None,
+                    "sources": [],
+                    "used_rag": False
+                }
             
             # Extract sources
             sources = []
@@ -195,47 +333,81 @@ class RAGService:
                 "used_rag": False
             }
     
-    def add_document(self, file_path):
-        """Add new document to knowledge base"""
-        try:
-            if file_path.endswith('.txt'):
-                loader = TextLoader(file_path, encoding='utf-8')
-            elif file_path.endswith('.pdf'):
-                loader = PyPDFLoader(file_path)
-            else:
+    def load_chunks(self, file_path):
+        """Load and split a document; returns None for unsupported files"""
+        from langchain_community.document_loaders import TextLoader, PyPDFLoader
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        
+        if file_path.endswith('.txt'):
+            loader = TextLoader(file_path, encoding='utf-8')
+        elif file_path.endswith('.pdf'):
+            loader = PyPDFLoader(file_path)
+        else:
+            return None
+        
+        documents = loader.load()
+        
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=500,
+            chunk_overlap=50
+        )
+        return text_splitter.split_documents(documents)
+    
+    def index_chunks(self, chunks, batch_size=64, progress=None, source=None, source_mtime=None):
+        """
+        Embed and add chunks to the vector store
+        
+        The index lock is held for the whole document, so a reload can
+        never run between two of its batches.
+        
+        Args:
+            chunks: Documents from load_chunks
+            batch_size: Chunks embedded and written per add_documents call
+            progress: Optional callback(done, total) after each batch
+            source: Path the chunks were loaded from
+            source_mtime: Modification time of source when it was loaded
+        """
+        with self._index_lock:
+            # This will trigger lazy loading if not already loaded
+            vectorstore = self.vectorstore
+            if not vectorstore:
                 return False
             
-            documents = loader.load()
-            
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=500,
-                chunk_overlap=50
-            )
-            chunks = text_splitter.split_documents(documents)
-            
-            # This will trigger lazy loading if not already loaded
-            if self.vectorstore:
-                self.vectorstore.add_documents(chunks)
-                self.vectorstore.persist()
+            if source and self._indexed_files.get(os.path.abspath(source)) == source_mtime:
+                # A reload already rebuilt the index from this version of the file
+                if progress:
+                    progress(len(chunks), len(chunks))
                 return True
             
-            return False
+            for start in range(0, len(chunks), batch_size):
+                batch = chunks[start:start + batch_size]
+                vectorstore.add_documents(batch)
+                if progress:
+                    progress(start + len(batch), len(chunks))
+            
+            vectorstore.persist()
+            if source:
+                self._indexed_files[os.path.abspath(source)] = source_mtime
+        return True
+    
+    def add_document(self, file_path):
+        """Add new document to knowledge base"""
+        try:
+            source_mtime = os.path.getmtime(file_path)
+            chunks = self.load_chunks(file_path)
+            if chunks is None:
+                return False
+            return self.index_chunks(chunks, source=file_path, source_mtime=source_mtime)
             
         except Exception as e:
             print(f"Error adding document: {e}")
             return False
     
     def reload_knowledge_base(self):
-        """Reload knowledge base from scratch"""
+        """Rebuild the knowledge base from docs_path, swapping it in when done"""
         try:
-            import shutil
-            if os.path.exists(self.db_path):
-                shutil.rmtree(self.db_path)
-            self._vectorstore = None
-            self._qa_chain = None
-            self._create_vectorstore()
-            self._create_qa_chain()
-            return True
+            with self._index_lock:
+                return self._rebuild()
         except Exception as e:
             print(f"Error reloading knowledge base: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import threading
+
+
+class CoalescingTimeout(Exception):
+    """Raised when a waiter gives up on an in-flight call"""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent identical calls within this process.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is in flight wait for and share its result. Nothing is
+    cached afterwards: once the leader returns the key is free again.
+    """
+
+    def __init__(self, default_timeout=30.0):
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {}
+
+    @staticmethod
+    def make_key(namespace, *parts, **params):
+        """Build a key from normalized inputs and model parameters"""
+        normalized = [
+            " ".join(part.lower().split()) if isinstance(part, str) else part
+            for part in parts
+        ]
+        payload = json.dumps([normalized, params], sort_keys=True, default=str)
+        return f"{namespace}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+    def _stat(self, namespace):
+        return self._stats.setdefault(namespace, {
+            'calls': 0,
+            'leaders': 0,
+            'coalesced': 0,
+            'timeouts': 0,
+            'errors': 0,
+            'max_waiters': 0
+        })
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn once for all concurrent callers of key
+
+        Args:
+            key: Result of make_key (namespace is the part before ':')
+            fn: Zero-argument callable doing the upstream call
+            timeout: Seconds a waiter will wait for the leader
+
+        Returns:
+            The leader's return value (its exception is re-raised to all)
+        """
+        namespace = key.split(':', 1)[0]
+        timeout = self.default_timeout if timeout is None else timeout
+
+        with self._lock:
+            stats = self._stat(namespace)
+            stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                stats['leaders'] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                stats['coalesced'] += 1
+                stats['max_waiters'] = max(stats['max_waiters'], call.waiters)
+                leader = False
+
+        if leader:
+            try:
+                call.result = fn()
+            except Exception as e:
+                call.error = e
+                with self._lock:
+                    stats['errors'] += 1
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+        elif not call.done.wait(timeout):
+            with self._lock:
+                stats['timeouts'] += 1
+            raise CoalescingTimeout(f"Timed out after {timeout}s waiting for {namespace}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'by_namespace': {name: dict(values) for name, values in self._stats.items()}
+            }
+
+
+# Shared by all services in this process
+single_flight = SingleFlight()
@@ -0,0 +1,188 @@
+import json
+import os
+import numpy as np
+
+
+class NumpyVectorIndex:
+    """Brute-force cosine index over a memory-mapped matrix.
+
+    Vectors are L2-normalized and stored in ``vectors.npy`` as float32 (the
+    default, scored in place with BLAS), or quantized to float16 or to int8
+    with one float32 scale per row. The quantized forms are 2x/4x smaller
+    but every query converts them to float32 block by block, which costs
+    more than the matmul itself.
+
+    Each document (text and metadata) is one UTF-8 JSON record in
+    ``documents.bin``; ``offsets.npy`` holds the record boundaries, and
+    ``index.json`` the dtype and dimension. Everything is opened with
+    ``mmap_mode='r'``, so gunicorn workers on the same host share the pages
+    through the OS page cache and only the top-k records are decoded.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    SCALES_FILE = "scales.npy"
+    OFFSETS_FILE = "offsets.npy"
+    DOCUMENTS_FILE = "documents.bin"
+    HEADER_FILE = "index.json"
+
+    DTYPES = ("float32", "float16", "int8")
+
+    # Rows scored per block; bounds the float32 scratch space per query
+    BLOCK_SIZE = 16384
+
+    def __init__(self, path, dtype="float32"):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}")
+        self.path = path
+        self.dtype = dtype
+        self._vectors = None
+        self._scales = None
+        self._offsets = None
+        self._documents = None
+        self._loaded_mtime = None
+
+    @property
+    def vectors_path(self):
+        return os.path.join(self.path, self.VECTORS_FILE)
+
+    def exists(self):
+        return os.path.exists(self.vectors_path) and \
+            os.path.exists(os.path.join(self.path, self.HEADER_FILE))
+
+    def __len__(self):
+        self._maybe_reload()
+        return 0 if self._vectors is None else len(self._vectors)
+
+    def _maybe_reload(self):
+        """(Re)open the files if another process or call rewrote them"""
+        if not self.exists():
+            return
+        mtime = os.stat(self.vectors_path).st_mtime_ns
+        if mtime == self._loaded_mtime:
+            return
+
+        with open(os.path.join(self.path, self.HEADER_FILE), encoding="utf-8") as f:
+            header = json.load(f)
+
+        self.dtype = header["dtype"]
+        self._vectors = np.load(self.vectors_path, mmap_mode="r")
+        self._offsets = np.load(os.path.join(self.path, self.OFFSETS_FILE), mmap_mode="r")
+        self._documents = np.memmap(
+            os.path.join(self.path, self.DOCUMENTS_FILE), dtype=np.uint8, mode="r"
+        )
+        self._scales = None
+        if self.dtype == "int8":
+            self._scales = np.load(os.path.join(self.path, self.SCALES_FILE), mmap_mode="r")
+        self._loaded_mtime = mtime
+
+    def _document(self, i):
+        """Decode one (text, metadata) record"""
+        record = json.loads(bytes(self._documents[self._offsets[i]:self._offsets[i + 1]]))
+        return record["text"], record["metadata"]
+
+    def _quantize(self, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.maximum(norms, 1e-12)
+
+        if self.dtype == "float32":
+            return vectors, None
+        if self.dtype == "float16":
+            return vectors.astype(np.float16), None
+
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales = np.maximum(scales, 1e-12).astype(np.float32)
+        quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales
+
+    def _write(self, vectors, scales, offsets, documents):
+        """Write files to temporaries and swap them in, so readers never see a partial index"""
+        os.makedirs(self.path, exist_ok=True)
+
+        def replace(name, write):
+            target = os.path.join(self.path, name)
+            tmp = target + ".tmp"
+            with open(tmp, "wb") as f:
+                write(f)
+            os.replace(tmp, target)
+
+        if scales is not None:
+            replace(self.SCALES_FILE, lambda f: np.save(f, scales))
+        header = {"dtype": self.dtype, "dim": int(vectors.shape[1])}
+        replace(self.HEADER_FILE, lambda f: f.write(json.dumps(header).encode("utf-8")))
+        replace(self.DOCUMENTS_FILE, lambda f: f.write(documents))
+        replace(self.OFFSETS_FILE, lambda f: np.save(f, offsets))
+        # Vectors last: their mtime is what readers use to detect a new index
+        replace(self.VECTORS_FILE, lambda f: np.save(f, vectors))
+
+    def add(self, vectors, texts, metadatas=None):
+        """Append vectors with their texts and metadata, then persist"""
+        if len(texts) == 0:
+            return
+        metadatas = metadatas or [{} for _ in texts]
+        new_vectors, new_scales = self._quantize(vectors)
+        records = [
+            json.dumps({"text": text, "metadata": metadata}).encode("utf-8")
+            for text, metadata in zip(texts, metadatas)
+        ]
+        new_offsets = np.cumsum([0] + [len(record) for record in records], dtype=np.int64)
+        new_documents = b"".join(records)
+
+        self._maybe_reload()
+        if self._vectors is not None and len(self._vectors):
+            new_vectors = np.concatenate([np.asarray(self._vectors), new_vectors])
+            if new_scales is not None:
+                new_scales = np.concatenate([np.asarray(self._scales), new_scales])
+            new_offsets = np.concatenate([
+                np.asarray(self._offsets), new_offsets[1:] + self._offsets[-1]
+            ])
+            new_documents = bytes(self._documents) + new_documents
+
+        self._write(new_vectors, new_scales, new_offsets, new_documents)
+        self._maybe_reload()
+
+    def search(self, query_vector, k=3):
+        """
+        Return the k most similar documents
+
+        Returns:
+            list of (text, metadata, score), best first
+        """
+        self._maybe_reload()
+        if self._vectors is None or len(self._vectors) == 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / max(np.linalg.norm(query), 1e-12)
+
+        if self.dtype == "float32":
+            scores = self._vectors @ query
+        else:
+            scores = np.empty(len(self._vectors), dtype=np.float32)
+            for start in range(0, len(self._vectors), self.BLOCK_SIZE):
+                end = start + self.BLOCK_SIZE
+                block = self._vectors[start:end].astype(np.float32)
+                scores[start:end] = block @ query
+                if self._scales is not None:
+                    scores[start:end] *= self._scales[start:end]
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            self._document(i) + (float(scores[i]),)
+            for i in top
+        ]
+
+    def clear(self):
+        for name in (self.VECTORS_FILE, self.SCALES_FILE, self.OFFSETS_FILE,
+                     self.DOCUMENTS_FILE, self.HEADER_FILE):
+            target = os.path.join(self.path, name)
+            if os.path.exists(target):
+                os.remove(target)
+        self._vectors = None
+        self._scales = None
+        self._offsets = None
+        self._documents = None
+        self._loaded_mtime = None
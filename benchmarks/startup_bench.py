@@ -0,0 +1,114 @@
+"""
+Measure app startup: import-time profile, time-to-first-request and RSS.
+
+Each run starts a fresh interpreter (like a gunicorn worker boot), builds
+the app with create_app(), serves one request through the test client and
+reports the wall time from process spawn to response plus the worker's RSS.
+The import profile comes from ``python -X importtime``.
+
+Usage:
+    python benchmarks/startup_bench.py [--runs 5] [--path /] [--top 25]
+        [--profile-output benchmarks/startup_importtime.txt]
+
+DATABASE_URL defaults to a throwaway SQLite file so no Postgres is needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json
+from app import create_app
+app = create_app()
+response = app.test_client().get({path!r})
+rss_kb = 0
+with open('/proc/self/status') as status:
+    for line in status:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+print(json.dumps({{'status': response.status_code, 'rss_mb': rss_kb / 1024}}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    if not env.get("DATABASE_URL"):
+        env["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.gettempdir(), "startup_bench.db")
+    return env
+
+
+def import_profile(top):
+    """Return (total_ms, rows) from -X importtime, rows sorted by cumulative time"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "from app import create_app; create_app()"],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+    # Top-level entries (no leading indentation) add up to the total
+    total_ms = sum(c for c, _, name in rows if not name.startswith("  ")) / 1000
+    rows.sort(reverse=True)
+    return total_ms, rows[:top]
+
+
+def first_request(path):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(path=path)],
+        cwd=ROOT, env=child_env(), capture_output=True, text=True, check=True
+    )
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed_ms, measured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--profile-output", default=os.path.join(ROOT, "benchmarks", "startup_importtime.txt"))
+    args = parser.parse_args()
+
+    total_ms, rows = import_profile(args.top)
+    lines = [
+        f"Import profile for create_app() (python -X importtime, Python {sys.version.split()[0]})",
+        f"Total import time: {total_ms:.1f} ms",
+        "",
+        f"{'cumulative ms':>14} {'self ms':>9}  module",
+    ]
+    lines += [f"{c / 1000:>14.1f} {s / 1000:>9.1f}  {name}" for c, s, name in rows]
+    report = "\n".join(lines) + "\n"
+    print(report)
+
+    if args.profile_output:
+        with open(args.profile_output, "w") as f:
+            f.write(report)
+        print(f"Profile written to {args.profile_output}\n")
+
+    timings = []
+    rss = []
+    for _ in range(args.runs):
+        elapsed_ms, measured = first_request(args.path)
+        timings.append(elapsed_ms)
+        rss.append(measured["rss_mb"])
+
+    print(f"Time to first request ({args.path}, {args.runs} runs): "
+          f"median {statistics.median(timings):.0f} ms, max {max(timings):.0f} ms")
+    print(f"Worker RSS after first request: median {statistics.median(rss):.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Compare the NumPy vector index with Chroma at 1k, 10k and 100k chunks.
+
+For each size, random 384-dim vectors (all-MiniLM-L6-v2's width) are
+written to both backends, then a fresh subprocess per backend measures
+index open time, top-3 query latency and RSS, so each measurement starts
+from a clean interpreter. Embedding cost is excluded: both backends get
+precomputed vectors.
+
+Usage:
+    python benchmarks/vector_index_bench.py [--sizes 1000 10000 100000]
+        [--dtype float32|float16|int8] [--queries 200] [--workdir bench_indexes]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import importlib.util
+
+import numpy as np
+
+DIM = 384
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_vector_index():
+    # Import the module directly so the app package (Flask etc.) is not loaded
+    spec = importlib.util.spec_from_file_location(
+        "vector_index", os.path.join(ROOT, "app", "services", "vector_index.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.NumpyVectorIndex
+
+
+def rss_mb():
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def make_vectors(n, seed):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+def build(backend, path, n, dtype):
+    vectors = make_vectors(n, seed=0)
+    texts = [f"chunk {i} " + "lorem ipsum " * 40 for i in range(n)]
+    metadatas = [{"source": f"doc{i % 50}.txt"} for i in range(n)]
+
+    if backend == "numpy":
+        load_vector_index()(path, dtype=dtype).add(vectors, texts, metadatas)
+        return
+
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    collection = client.create_collection("bench", metadata={"hnsw:space": "cosine"})
+    batch = 5000
+    for start in range(0, n, batch):
+        end = min(start + batch, n)
+        collection.add(
+            ids=[str(i) for i in range(start, end)],
+            embeddings=vectors[start:end].tolist(),
+            documents=texts[start:end],
+            metadatas=metadatas[start:end],
+        )
+
+
+def measure(backend, path, queries):
+    """Runs in a child process; prints one JSON line"""
+    base_rss = rss_mb()
+    query_vectors = make_vectors(queries, seed=1)
+
+    started = time.perf_counter()
+    if backend == "numpy":
+        index = load_vector_index()(path)
+        len(index)  # forces the files to be opened
+        search = lambda q: index.search(q, 3)
+    else:
+        import chromadb
+        collection = chromadb.PersistentClient(path=path).get_collection("bench")
+        search = lambda q: collection.query(query_embeddings=[q.tolist()], n_results=3)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    latencies = []
+    for query in query_vectors:
+        started = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    print(json.dumps({
+        "load_ms": load_ms,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - base_rss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["numpy", "chroma"])
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--workdir", default="bench_indexes")
+    parser.add_argument("--measure", nargs=2, metavar=("BACKEND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure[0], args.measure[1], args.queries)
+        return
+
+    print(f"{'backend':<8} {'chunks':>8} {'build s':>8} {'load ms':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8} {'+RSS MB':>8}")
+
+    for n in args.sizes:
+        for backend in args.backends:
+            path = os.path.join(args.workdir, f"{backend}_{n}")
+            shutil.rmtree(path, ignore_errors=True)
+
+            started = time.perf_counter()
+            build(backend, path, n, args.dtype)
+            build_s = time.perf_counter() - started
+
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", backend, path,
+                 "--queries", str(args.queries)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+
+            print(f"{backend:<8} {n:>8} {build_s:>8.1f} {result['load_ms']:>9.1f} "
+                  f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+                  f"{result['rss_mb']:>8.0f} {result['rss_delta_mb']:>8.0f}")
+
+    shutil.rmtree(args.workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Labelled check for the intent router's fast path.
+
+Each case is a customer message and the intent the fast path may answer it
+with, or None when it must fall back to the LLM. A wrong answer (an intent
+other than the label) fails the check; a missed fast path is only reported,
+since the LLM still answers those correctly.
+
+Usage:
+    python scripts/check_intent_router.py [--threshold 0.5] [--margin 0.1]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.intent_router import IntentRouter
+
+LABELLED_CASES = [
+    # Structured intents the fast path should answer
+    ("where is my order ORD-001", "order_status"),
+    ("has my order shipped", "order_status"),
+    ("is my order delivered yet", "order_status"),
+    ("status of my order please", "order_status"),
+    ("how much did I pay for ORD-001", "order_amount"),
+    ("what was the total of my order", "order_amount"),
+    ("how much was my order", "order_amount"),
+    ("what is the price of order ORD-004", "order_amount"),
+    ("can I cancel my order", "cancellation_window"),
+    ("how long do I have to cancel", "cancellation_window"),
+    ("what is the cancellation policy", "cancellation_window"),
+
+    # Look like order questions but must go to the LLM
+    ("what is the return policy for my order", None),
+    ("my order ORD-002 arrived damaged, I want a refund", None),
+    ("I want to return my order", None),
+    ("refund for order ORD-001", None),
+    ("my order arrived broken", None),
+    ("my order is the wrong size", None),
+    ("does my order have a warranty", None),
+    ("can I change the shipping address on my order", None),
+    ("I want to exchange my order", None),
+    ("what does my order cost to return", None),
+    ("can I cancel my order and get a refund", None),
+    ("what is the status of my refund", None),
+    ("where is my refund", None),
+    ("where do I send a return", None),
+    ("how much does shipping cost", None),
+    ("hello", None),
+    ("what is your phone number", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check intent routing against labelled messages")
+    parser.add_argument('--threshold', type=float, default=0.5)
+    parser.add_argument('--margin', type=float, default=0.1)
+    args = parser.parse_args()
+
+    router = IntentRouter(confidence_threshold=args.threshold, margin=args.margin)
+
+    wrong, missed = [], []
+    for message, expected in LABELLED_CASES:
+        intent, score = router.classify(message)
+        if intent == "other":
+            intent = None
+        if intent == expected:
+            continue
+        entry = f"  {message!r}: expected {expected}, got {intent} ({score:.2f})"
+        (missed if intent is None else wrong).append(entry)
+
+    print(f"{len(LABELLED_CASES)} cases, {len(wrong)} wrong answers, {len(missed)} missed fast paths")
+    if missed:
+        print("Missed (falls back to the LLM):")
+        print("\n".join(missed))
+    if wrong:
+        print("Wrong answers:")
+        print("\n".join(wrong))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
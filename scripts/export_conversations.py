@@ -0,0 +1,107 @@
+"""
+Export conversation logs from MongoDB without loading them into memory.
+
+Examples:
+    python scripts/export_conversations.py --format ndjson -o turns.ndjson
+    python scripts/export_conversations.py --format csv --start 2026-01-01 --end 2026-02-01
+    python scripts/export_conversations.py --format parquet -o turns.parquet   # needs pyarrow
+
+The resume cursor of the last exported row is printed to stderr when the
+export finishes or is interrupted; pass it back with --cursor to continue.
+
+    python scripts/export_conversations.py --ensure-indexes
+
+creates the (timestamp, _id) index exports scan by and exits; run it once
+per deploy so neither this script nor GET /api/export/conversations sorts
+the collection in memory.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+from app.services.analytics_service import AnalyticsService
+from app.services.export_service import ConversationExporter, DEFAULT_FIELDS
+
+INT_FIELDS = {'input_length', 'response_length'}
+
+
+def write_parquet(exporter, path, chunk_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Parquet export needs pyarrow: pip install pyarrow")
+
+    def field_type(name):
+        if name == 'timestamp':
+            return pa.timestamp('ms')
+        if name in INT_FIELDS:
+            return pa.int64()
+        return pa.string()
+
+    schema = pa.schema([(name, field_type(name)) for name in exporter.fields])
+    with pq.ParquetWriter(path, schema) as writer:
+        # One row group per chunk keeps memory bounded by chunk_size
+        for chunk in exporter.column_chunks(chunk_size, raw=True):
+            chunk['_id'] = [str(value) for value in chunk['_id']]
+            writer.write_table(pa.Table.from_pydict(chunk, schema=schema))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream conversation logs out of MongoDB")
+    parser.add_argument('--format', choices=['ndjson', 'csv', 'columns', 'parquet'], default='ndjson')
+    parser.add_argument('-o', '--output', help="Output file (default: stdout; required for parquet)")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="Inclusive start (ISO, UTC)")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="Exclusive end (ISO, UTC)")
+    parser.add_argument('--cursor', help="Resume after this cursor")
+    parser.add_argument('--fields', help=f"Comma-separated fields (default: {','.join(DEFAULT_FIELDS)})")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Mongo cursor batch size")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Rows per columnar chunk")
+    parser.add_argument('--ensure-indexes', action='store_true',
+                        help="Create the export index and exit (deploy step)")
+    args = parser.parse_args()
+
+    analytics = AnalyticsService(Config.MONGODB_URI, Config.MONGODB_DB_NAME)
+    if args.ensure_indexes:
+        analytics.ensure_indexes()
+        print("Export indexes are in place", file=sys.stderr)
+        return
+
+    exporter = ConversationExporter(
+        analytics,
+        start=args.start,
+        end=args.end,
+        after=args.cursor,
+        fields=args.fields.split(',') if args.fields else None,
+        batch_size=args.batch_size
+    )
+
+    try:
+        if args.format == 'parquet':
+            if not args.output:
+                sys.exit("--output is required for parquet")
+            write_parquet(exporter, args.output, args.chunk_size)
+        else:
+            stream = exporter.columns(args.chunk_size) if args.format == 'columns' \
+                else exporter.stream(args.format)
+            output = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+            try:
+                for piece in stream:
+                    output.write(piece)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+    except KeyboardInterrupt:
+        print("\nInterrupted.", file=sys.stderr)
+    finally:
+        print(f"Exported {exporter.rows_exported} rows", file=sys.stderr)
+        if exporter.cursor:
+            print(f"Resume cursor: {exporter.cursor}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+"""
+Replay logged conversations through /api/chat and report latency.
+
+Sessions are read from the Mongo `conversations` collection (or from an
+NDJSON file written by export_conversations.py) and replayed with their
+original session_id and customer_email. Turns within a session run in
+order; sessions run concurrently. Every turn is scheduled on its own: a
+session starts at its original offset and each later turn is sent the
+original gap after the previous one (divided by --speed, 0 = no waiting),
+or as soon as the previous response arrives if that takes longer. The
+report's schedule lag shows how far sends slipped behind that schedule.
+
+Targets:
+    --url http://localhost:10000   replay against a running server
+    (default)                      replay in-process through the Flask test
+                                   client, with Groq (and optionally RAG)
+                                   replaced by stubs of configurable latency
+
+Examples:
+    python scripts/replay_conversations.py --start 2026-09-01 --max-sessions 200 --speed 10
+    python scripts/replay_conversations.py --from-file turns.ndjson --speed 0 --report run.json
+    python scripts/replay_conversations.py --url http://localhost:10000 --real-backends
+
+In-process replays never write to analytics. Against --url, replayed
+requests carry X-Replay: <token>; the server skips logging them only when
+the token matches its REPLAY_TOKEN setting.
+"""
+import argparse
+import heapq
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import types
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import Config
+
+REPLAY_FIELDS = ['session_id', 'timestamp', 'user_input', 'customer_email']
+
+
+def parse_timestamp(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def load_turns(args):
+    """Yield turn dicts in timestamp order from Mongo or an NDJSON export"""
+    if args.from_file:
+        with open(args.from_file, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    from app.services.analytics_service import AnalyticsService
+    from app.services.export_service import ConversationExporter
+
+    analytics = AnalyticsService(Config.MONGODB_URI, Config.MONGODB_DB_NAME)
+    exporter = ConversationExporter(
+        analytics, start=args.start, end=args.end, fields=REPLAY_FIELDS
+    )
+    yield from exporter.rows()
+
+
+def load_sessions(args):
+    """Group turns into sessions, keeping at most --max-sessions"""
+    sessions = OrderedDict()
+    for turn in load_turns(args):
+        session_id = turn.get('session_id')
+        if not session_id or not turn.get('user_input'):
+            continue
+        if session_id not in sessions:
+            if args.max_sessions and len(sessions) >= args.max_sessions:
+                continue
+            sessions[session_id] = []
+        sessions[session_id].append({
+            'offset': parse_timestamp(turn['timestamp']),
+            'message': turn['user_input'],
+            'customer_email': turn.get('customer_email')
+        })
+
+    if not sessions:
+        return []
+
+    start = min(turns[0]['offset'] for turns in sessions.values())
+    for turns in sessions.values():
+        for turn in turns:
+            turn['offset'] = (turn['offset'] - start).total_seconds()
+    return list(sessions.items())
+
+
+class StubCompletions:
+    """Stands in for groq.Groq().chat.completions with a latency distribution"""
+
+    def __init__(self, latency_ms, jitter_ms):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def create(self, model, messages, temperature, max_tokens, timeout=None):
+        delay = max(random.gauss(self.latency_ms, self.jitter_ms), 0) / 1000
+        time.sleep(delay)
+        content = f"[stub {model}] Thanks for reaching out, here is what I found."
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+class StubRAG:
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+
+    def query(self, question, customer_context=""):
+        time.sleep(self.latency_ms / 1000)
+        return {"answer": "According to our policy: stub answer.", "sources": ["company_faq.txt"], "used_rag": True}
+
+
+class HttpTarget:
+    def __init__(self, base_url, replay_token=None):
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.local = threading.local()
+        self.requests = requests
+        self.headers = {'X-Replay': replay_token} if replay_token else {}
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = self.requests.Session()
+        return self.local.session
+
+    def chat(self, payload):
+        response = self._session().post(
+            f"{self.base_url}/api/chat", json=payload, headers=self.headers, timeout=60
+        )
+        return response.status_code, response.json()
+
+    def metrics(self):
+        try:
+            return self._session().get(f"{self.base_url}/api/metrics", timeout=10).json()
+        except Exception:
+            return {}
+
+
+class InProcessTarget:
+    def __init__(self, args):
+        from app import create_app
+        from app import routes
+
+        if not args.real_backends and not Config.GROQ_API_KEY:
+            # The Groq client insists on a key even though the stub never uses it
+            Config.GROQ_API_KEY = 'replay-stub'
+
+        self.app = create_app()
+        self.local = threading.local()
+
+        with self.app.app_context():
+            # Never write replayed turns into the analytics collection
+            self.app._analytics = None
+            if not args.real_backends:
+                groq = routes.get_groq_service()
+                groq.router.client = types.SimpleNamespace(
+                    chat=types.SimpleNamespace(
+                        completions=StubCompletions(args.stub_llm_ms, args.stub_llm_jitter_ms)
+                    )
+                )
+                if args.stub_rag_ms is not None:
+                    self.app.rag_service = StubRAG(args.stub_rag_ms)
+            # Build the remaining lazily-created services before threads race for them
+            routes.get_admission_controller()
+            routes.get_intent_router()
+
+    def _client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        return self.local.client
+
+    def chat(self, payload):
+        response = self._client().post('/api/chat', json=payload)
+        return response.status_code, response.get_json()
+
+    def metrics(self):
+        return self._client().get('/api/metrics').get_json()
+
+
+def send_turn(target, session_id, turn):
+    payload = {
+        'message': turn['message'],
+        'session_id': session_id,
+        'customer_email': turn['customer_email']
+    }
+    started = time.perf_counter()
+    try:
+        status, body = target.chat(payload)
+    except Exception as e:
+        status, body = 'exception', {'error': str(e)}
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'session_id': session_id,
+        'status': status,
+        'latency_ms': latency_ms,
+        'intent': (body or {}).get('intent'),
+        'used_rag': bool((body or {}).get('used_rag'))
+    }
+
+
+def replay(target, sessions, speed, concurrency):
+    """
+    Send every turn from a schedule heap
+
+    Workers only hold a thread while a request is in flight, so a session
+    never waits for another session to finish before it can start.
+
+    Returns:
+        tuple of (results, wall seconds)
+    """
+    results = []
+    heap = []
+    seq = itertools.count()
+    cond = threading.Condition()
+    remaining = sum(len(turns) for _, turns in sessions)
+    run_start = time.monotonic()
+
+    def scaled(seconds):
+        return seconds / speed if speed else 0.0
+
+    for session_id, turns in sessions:
+        heapq.heappush(heap, (run_start + scaled(turns[0]['offset']), next(seq), session_id, turns, 0))
+
+    def run(due, session_id, turns, index):
+        nonlocal remaining
+        sent = time.monotonic()
+        result = None
+        try:
+            result = send_turn(target, session_id, turns[index])
+            result['lag_ms'] = (sent - due) * 1000
+        finally:
+            with cond:
+                if result:
+                    results.append(result)
+                remaining -= 1
+                if index + 1 < len(turns):
+                    # Keep the original gap, but never overlap turns of one session
+                    gap = scaled(turns[index + 1]['offset'] - turns[index]['offset'])
+                    next_due = max(sent + gap, time.monotonic())
+                    heapq.heappush(heap, (next_due, next(seq), session_id, turns, index + 1))
+                cond.notify()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        with cond:
+            while remaining:
+                if not heap:
+                    cond.wait()
+                    continue
+                delay = heap[0][0] - time.monotonic()
+                if delay > 0:
+                    cond.wait(delay)
+                    continue
+                due, _, session_id, turns, index = heapq.heappop(heap)
+                pool.submit(run, due, session_id, turns, index)
+
+    return results, time.monotonic() - run_start
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def coalescing_delta(before, after):
+    delta = {}
+    namespaces = (after.get('coalescing') or {}).get('by_namespace', {})
+    previous = (before.get('coalescing') or {}).get('by_namespace', {})
+    for name, stats in namespaces.items():
+        calls = stats['calls'] - previous.get(name, {}).get('calls', 0)
+        coalesced = stats['coalesced'] - previous.get(name, {}).get('coalesced', 0)
+        delta[name] = {
+            'calls': calls,
+            'coalesced': coalesced,
+            'hit_rate': round(coalesced / calls, 3) if calls else 0.0
+        }
+    return delta
+
+
+def build_report(args, results, wall_s, before, after):
+    ok = [r for r in results if r['status'] == 200]
+    latencies = [r['latency_ms'] for r in ok]
+    lags = [r['lag_ms'] for r in results]
+    total = len(results) or 1
+
+    return {
+        'run': {
+            'label': args.label,
+            'target': args.url or 'in-process',
+            'stub_backends': not args.url and not args.real_backends,
+            'speed': args.speed,
+            'sessions': len({r['session_id'] for r in results}),
+            'turns': len(results),
+            'wall_seconds': round(wall_s, 2),
+            'throughput_rps': round(len(results) / wall_s, 2) if wall_s else 0.0
+        },
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 1),
+            'p90': round(percentile(latencies, 90), 1),
+            'p95': round(percentile(latencies, 95), 1),
+            'p99': round(percentile(latencies, 99), 1),
+            'max': round(max(latencies), 1) if latencies else 0.0,
+            'mean': round(statistics.mean(latencies), 1) if latencies else 0.0
+        },
+        'schedule_lag_ms': {
+            'p50': round(percentile(lags, 50), 1),
+            'p95': round(percentile(lags, 95), 1),
+            'max': round(max(lags), 1) if lags else 0.0
+        },
+        'status_codes': {str(code): count for code, count in Counter(r['status'] for r in results).items()},
+        'fast_path_rate': round(sum(1 for r in ok if r['intent']) / total, 3),
+        'intents': dict(Counter(r['intent'] for r in ok if r['intent'])),
+        'rag_usage_rate': round(sum(1 for r in ok if r['used_rag']) / total, 3),
+        'coalescing': coalescing_delta(before, after),
+        'model_routing': after.get('model_routing', {}),
+        'admission': after.get('admission', {})
+    }
+
+
+def print_report(report):
+    run = report['run']
+    latency = report['latency_ms']
+    label = f" '{run['label']}'" if run['label'] else ''
+    print(f"\nReplay{label} against {run['target']}"
+          f"{' (stubbed backends)' if run['stub_backends'] else ''}")
+    print(f"  {run['sessions']} sessions, {run['turns']} turns in {run['wall_seconds']}s "
+          f"({run['throughput_rps']} turns/s, speed x{run['speed'] or 'max'})")
+    print(f"  latency ms: p50 {latency['p50']}  p90 {latency['p90']}  p95 {latency['p95']}  "
+          f"p99 {latency['p99']}  max {latency['max']}")
+    lag = report['schedule_lag_ms']
+    print(f"  schedule lag ms: p50 {lag['p50']}  p95 {lag['p95']}  max {lag['max']}")
+    print(f"  status codes: {report['status_codes']}")
+    print(f"  fast path: {report['fast_path_rate']:.1%}  RAG used: {report['rag_usage_rate']:.1%}")
+    for name, stats in report['coalescing'].items():
+        print(f"  coalescing[{name}]: {stats['coalesced']}/{stats['calls']} ({stats['hit_rate']:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay logged conversations through /api/chat")
+    parser.add_argument('--from-file', help="NDJSON export to replay instead of reading Mongo")
+    parser.add_argument('--start', type=datetime.fromisoformat, help="Inclusive start (ISO, UTC)")
+    parser.add_argument('--end', type=datetime.fromisoformat, help="Exclusive end (ISO, UTC)")
+    parser.add_argument('--max-sessions', type=int, default=100)
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help="Time acceleration; 1 = original pacing, 0 = no waiting")
+    parser.add_argument('--concurrency', type=int,
+                        help="Max requests in flight (default: one per session)")
+    parser.add_argument('--url', help="Base URL of a running server (default: in-process)")
+    parser.add_argument('--replay-token', default=Config.REPLAY_TOKEN,
+                        help="--url only: X-Replay token matching the server's REPLAY_TOKEN")
+    parser.add_argument('--real-backends', action='store_true',
+                        help="In-process only: call the real Groq/RAG instead of stubs")
+    parser.add_argument('--stub-llm-ms', type=float, default=800)
+    parser.add_argument('--stub-llm-jitter-ms', type=float, default=250)
+    parser.add_argument('--stub-rag-ms', type=float, help="Attach a stub RAG service with this latency")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default='', help="Name for this run (e.g. a git sha)")
+    parser.add_argument('--report', help="Write the JSON report here for comparing builds")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    sessions = load_sessions(args)
+    if not sessions:
+        sys.exit("No conversations found to replay")
+    print(f"Loaded {len(sessions)} sessions, {sum(len(t) for _, t in sessions)} turns")
+
+    if args.url and not args.replay_token:
+        print("Warning: no --replay-token, the server will log replayed turns to analytics")
+
+    target = HttpTarget(args.url, args.replay_token) if args.url else InProcessTarget(args)
+    before = target.metrics() or {}
+
+    results, wall_s = replay(target, sessions, args.speed, args.concurrency or len(sessions))
+
+    report = build_report(args, results, wall_s, before, target.metrics() or {})
+    print_report(report)
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -20,7 +20,7 @@ textInput.addEventListener('keypress', (e) => {
 });
 resetBtn.addEventListener('click', resetConversation);
 
-window.addEventListener('load', loadAnalytics);
+window.addEventListener('load', subscribeAnalytics);
 
 async function toggleRecording() {
     if (!isRecording) {
@@ -83,7 +83,7 @@ async function processAudio(audioBlob) {
             const transcriptResponse = await fetch('/api/transcribe', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ audio: base64Audio })
+                body: JSON.stringify({ audio: base64Audio, session_id: sessionId })
             });
             
             const transcriptData = await transcriptResponse.json();
@@ -121,7 +121,7 @@ async function processAudio(audioBlob) {
             const synthesizeResponse = await fetch('/api/synthesize', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ text: botResponse })
+                body: JSON.stringify({ text: botResponse, session_id: sessionId })
             });
             
             const synthesizeData = await synthesizeResponse.json();
@@ -230,7 +230,11 @@ async function resetConversation() {
     if (!confirm('Are you sure you want to reset the conversation?')) return;
     
     try {
-        await fetch('/api/reset', { method: 'POST' });
+        await fetch('/api/reset', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ session_id: sessionId })
+        });
         
         chatContainer.innerHTML = `
             <div class="chat-message bot-message">
@@ -250,52 +254,21 @@ async function resetConversation() {
     }
 }
 
+// Latest dashboard state, kept in sync by the analytics event stream
+let analyticsState = null;
+
 async function loadAnalytics() {
     try {
-        const response = await fetch('/api/analytics');
+        // 'no-cache' revalidates with If-None-Match, so unchanged data costs a 304
+        const response = await fetch('/api/analytics', { cache: 'no-cache' });
         const data = await response.json();
         
         if (data.error) {
             throw new Error(data.error);
         }
         
-        const analyticsContent = document.getElementById('analyticsContent');
-        
-        const html = `
-            <div class="stat-grid">
-                <div class="stat-card">
-                    <h3>${data.summary.total_conversations || 0}</h3>
-                    <p>Total Conversations</p>
-                </div>
-                <div class="stat-card">
-                    <h3>${data.summary.unique_sessions || 0}</h3>
-                    <p>Unique Sessions</p>
-                </div>
-                <div class="stat-card">
-                    <h3>${data.summary.avg_response_length || 0}</h3>
-                    <p>Avg Response Length</p>
-                </div>
-                <div class="stat-card">
-                    <h3>${data.summary.avg_input_length || 0}</h3>
-                    <p>Avg Input Length</p>
-                </div>
-            </div>
-            
-            <h4>Recent Conversations</h4>
-            <div style="max-height: 200px; overflow-y: auto;">
-                ${data.recent_conversations.map(conv => `
-                    <div style="margin-bottom: 10px; padding: 10px; background: white; border-radius: 8px;">
-                        <p><strong>User:</strong> ${conv.user_input}</p>
-                        <p><strong>Bot:</strong> ${conv.bot_response}</p>
-                        <p style="font-size: 0.8em; color: #999;">
-                            ${new Date(conv.timestamp).toLocaleString()}
-                        </p>
-                    </div>
-                `).join('')}
-            </div>
-        `;
-        
-        analyticsContent.innerHTML = html;
+        analyticsState = data;
+        renderAnalytics();
         
     } catch (error) {
         console.error('Error loading analytics:', error);
@@ -304,7 +277,87 @@ async function loadAnalytics() {
     }
 }
 
-setInterval(loadAnalytics, 30000);
+function renderAnalytics() {
+    const data = analyticsState;
+    const analyticsContent = document.getElementById('analyticsContent');
+    
+    const html = `
+        <div class="stat-grid">
+            <div class="stat-card">
+                <h3>${data.summary.total_conversations || 0}</h3>
+                <p>Total Conversations</p>
+            </div>
+            <div class="stat-card">
+                <h3>${data.summary.unique_sessions || 0}</h3>
+                <p>Unique Sessions</p>
+            </div>
+            <div class="stat-card">
+                <h3>${data.summary.avg_response_length || 0}</h3>
+                <p>Avg Response Length</p>
+            </div>
+            <div class="stat-card">
+                <h3>${data.summary.avg_input_length || 0}</h3>
+                <p>Avg Input Length</p>
+            </div>
+        </div>
+        
+        <h4>Recent Conversations</h4>
+        <div style="max-height: 200px; overflow-y: auto;">
+            ${data.recent_conversations.map(conv => `
+                <div style="margin-bottom: 10px; padding: 10px; background: white; border-radius: 8px;">
+                    <p><strong>User:</strong> ${conv.user_input}</p>
+                    <p><strong>Bot:</strong> ${conv.bot_response}</p>
+                    <p style="font-size: 0.8em; color: #999;">
+                        ${new Date(conv.timestamp).toLocaleString()}
+                    </p>
+                </div>
+            `).join('')}
+        </div>
+    `;
+    
+    analyticsContent.innerHTML = html;
+}
+
+function pollAnalytics() {
+    // Polling fallback, cheap thanks to the ETag
+    loadAnalytics();
+    setInterval(loadAnalytics, 30000);
+}
+
+function subscribeAnalytics() {
+    if (!window.EventSource) {
+        pollAnalytics();
+        return;
+    }
+    
+    const source = new EventSource('/api/analytics/stream');
+    
+    source.onerror = () => {
+        // The server refuses streams past its cap (503) and EventSource
+        // does not retry a refused connection, so poll instead
+        if (source.readyState === EventSource.CLOSED) {
+            pollAnalytics();
+        }
+    };
+    
+    source.addEventListener('snapshot', (event) => {
+        analyticsState = JSON.parse(event.data);
+        renderAnalytics();
+    });
+    
+    source.addEventListener('summary', (event) => {
+        if (!analyticsState) return;
+        Object.assign(analyticsState.summary, JSON.parse(event.data));
+        renderAnalytics();
+    });
+    
+    source.addEventListener('conversation', (event) => {
+        if (!analyticsState) return;
+        analyticsState.recent_conversations.unshift(JSON.parse(event.data));
+        analyticsState.recent_conversations = analyticsState.recent_conversations.slice(0, 5);
+        renderAnalytics();
+    });
+}
 
 // Document upload
 document.getElementById('uploadBtn').addEventListener('click', async () => {
@@ -333,13 +386,35 @@ document.getElementById('uploadBtn').addEventListener('click', async () => {
         if (data.error) {
             status.innerHTML = `<p style="color:red">${data.error}</p>`;
         } else {
-            status.innerHTML = `<p style="color:green">✅ ${data.message}</p>`;
+            pollIngestJob(data.job_id, status, `Document ${file.name} added successfully!`);
         }
     } catch (error) {
         status.innerHTML = '<p style="color:red">Upload failed!</p>';
     }
 });
 
+// Poll a background ingestion job until it finishes
+async function pollIngestJob(jobId, status, successMessage) {
+    try {
+        const response = await fetch(`/api/ingest-jobs/${jobId}`);
+        const job = await response.json();
+        
+        if (job.error && job.status !== 'failed') {
+            status.innerHTML = `<p style="color:red">${job.error}</p>`;
+        } else if (job.status === 'succeeded') {
+            status.innerHTML = `<p style="color:green">✅ ${successMessage}</p>`;
+        } else if (job.status === 'failed') {
+            status.innerHTML = `<p style="color:red">Ingestion failed: ${job.error}</p>`;
+        } else {
+            const percent = Math.round(job.progress * 100);
+            status.innerHTML = `<p>Processing (${job.stage}, ${percent}%)...</p>`;
+            setTimeout(() => pollIngestJob(jobId, status, successMessage), 1000);
+        }
+    } catch (error) {
+        status.innerHTML = '<p style="color:red">Could not get ingestion status!</p>';
+    }
+}
+
 // Reload knowledge base
 document.getElementById('reloadKbBtn').addEventListener('click', async () => {
     const status = document.getElementById('uploadStatus');
@@ -350,8 +425,12 @@ document.getElementById('reloadKbBtn').addEventListener('click', async () => {
             method: 'POST'
         });
         const data = await response.json();
-        const message = data.message || 'Knowledge base reloaded successfully!';
-        status.innerHTML = `<p style="color:green">✅ ${message}</p>`;
+        
+        if (data.error) {
+            status.innerHTML = `<p style="color:red">${data.error}</p>`;
+        } else {
+            pollIngestJob(data.job_id, status, 'Knowledge base reloaded successfully!');
+        }
     } catch (error) {
         status.innerHTML = '<p style="color:red">Reload failed!</p>';
     }
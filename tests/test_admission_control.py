@@ -0,0 +1,149 @@
+import threading
+import time
+
+import pytest
+
+from app.services import admission_control
+from app.services.admission_control import (
+    AdmissionController, AdmissionRejected, RouteLimiter,
+    PRIORITY_ACTIVE_SESSION, PRIORITY_NEW_SESSION, limits_from_threads
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def acquire_in_thread(limiter, priority):
+    """Start an acquire on a thread; returns (thread, outcome dict)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["ticket"] = limiter.acquire(priority)
+        except AdmissionRejected as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_priority_request_evicts_new_session_from_a_full_queue():
+    limiter = RouteLimiter(concurrency=1, max_queue=1, max_wait=5.0)
+    running = limiter.acquire(PRIORITY_NEW_SESSION)
+
+    new_thread, new_outcome = acquire_in_thread(limiter, PRIORITY_NEW_SESSION)
+    wait_for(lambda: limiter.snapshot()["queue_depth"] == 1)
+
+    active_thread, active_outcome = acquire_in_thread(limiter, PRIORITY_ACTIVE_SESSION)
+    new_thread.join(2)
+    assert "displaced" in new_outcome["error"].reason
+    assert limiter.snapshot()["evicted"] == 1
+
+    running.__exit__(None, None, None)
+    active_thread.join(2)
+    assert "ticket" in active_outcome
+    active_outcome["ticket"].__exit__(None, None, None)
+
+
+def test_full_queue_rejects_equal_priority():
+    limiter = RouteLimiter(concurrency=1, max_queue=1, max_wait=5.0)
+    running = limiter.acquire(PRIORITY_ACTIVE_SESSION)
+    queued_thread, queued_outcome = acquire_in_thread(limiter, PRIORITY_ACTIVE_SESSION)
+    wait_for(lambda: limiter.snapshot()["queue_depth"] == 1)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire(PRIORITY_NEW_SESSION)
+    assert rejected.value.status == 503
+    assert limiter.snapshot()["rejected_queue_full"] == 1
+
+    running.__exit__(None, None, None)
+    queued_thread.join(2)
+    queued_outcome["ticket"].__exit__(None, None, None)
+
+
+def test_predicted_wait_past_deadline_is_rejected_without_queueing():
+    limiter = RouteLimiter(concurrency=1, max_queue=5, max_wait=0.5)
+    limiter.avg_service = 2.0
+    running = limiter.acquire(PRIORITY_NEW_SESSION)
+
+    started = time.monotonic()
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire(PRIORITY_ACTIVE_SESSION)
+
+    assert time.monotonic() - started < 0.1
+    assert rejected.value.retry_after == 2
+    snapshot = limiter.snapshot()
+    assert snapshot["rejected_deadline"] == 1
+    assert snapshot["queue_depth"] == 0
+    running.__exit__(None, None, None)
+
+
+def test_queued_request_times_out_at_max_wait():
+    limiter = RouteLimiter(concurrency=1, max_queue=5, max_wait=0.2)
+    limiter.avg_service = 0.1
+    running = limiter.acquire(PRIORITY_NEW_SESSION)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire(PRIORITY_NEW_SESSION)
+
+    assert "timed out" in rejected.value.reason
+    snapshot = limiter.snapshot()
+    assert snapshot["rejected_timeout"] == 1
+    assert snapshot["queue_depth"] == 0
+    running.__exit__(None, None, None)
+
+
+def test_session_bucket_returns_429_until_it_refills(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(admission_control, "time", clock)
+    controller = AdmissionController({}, session_rate=1.0, session_burst=2)
+
+    controller.admit("chat", session_id="a")
+    controller.admit("chat", session_id="a")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit("chat", session_id="a")
+    assert rejected.value.status == 429
+    assert rejected.value.retry_after == 1
+
+    # Other sessions and routes that are not rate limited are unaffected
+    controller.admit("chat", session_id="b")
+    controller.admit("transcribe", session_id="a")
+
+    clock.now += 1.0
+    controller.admit("chat", session_id="a")
+    with pytest.raises(AdmissionRejected):
+        controller.admit("chat", session_id="a")
+    assert controller.stats()["rate_limited"] == 2
+
+
+def test_sessionless_requests_are_rate_limited_per_client(monkeypatch):
+    monkeypatch.setattr(admission_control, "time", FakeClock())
+    controller = AdmissionController({}, session_rate=1.0, session_burst=1)
+
+    controller.admit("chat", client_id="10.0.0.1")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.admit("chat", client_id="10.0.0.1")
+    assert rejected.value.status == 429
+    controller.admit("chat", client_id="10.0.0.2")
+
+
+def test_limits_never_exceed_the_thread_budget():
+    limits = limits_from_threads(20, {"chat": 0.6, "transcribe": 0.2, "synthesize": 0.2}, 3.0)
+
+    assert limits["chat"] == (8, 4, 3.0)
+    assert sum(concurrency + queue for concurrency, queue, _ in limits.values()) <= 20
+    with pytest.raises(ValueError):
+        limits_from_threads(20, {"chat": 0.8, "transcribe": 0.4}, 3.0)
@@ -0,0 +1,73 @@
+import threading
+import time
+import types
+
+from app.services.groq_service import GroqService
+
+
+class SlowCompletions:
+    """Stub Groq completions endpoint that counts upstream calls"""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, temperature, max_tokens, timeout=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        message = types.SimpleNamespace(content=f"answer to: {messages[-1]['content']}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def make_service(completions):
+    service = GroqService("test-key")
+    service.router.client = types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=completions)
+    )
+    return service
+
+
+def chat_concurrently(service, requests):
+    barrier = threading.Barrier(len(requests))
+    answers = [None] * len(requests)
+
+    def run(index, message, session_id):
+        barrier.wait()
+        answers[index] = service.chat(message, session_id=session_id)
+
+    threads = [
+        threading.Thread(target=run, args=(index, message, session_id))
+        for index, (message, session_id) in enumerate(requests)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return answers
+
+
+def test_identical_first_turns_from_many_sessions_share_one_call():
+    completions = SlowCompletions()
+    service = make_service(completions)
+
+    answers = chat_concurrently(
+        service, [("What is your return policy?", f"session-{i}") for i in range(12)]
+    )
+
+    assert completions.calls == 1
+    assert set(answers) == {"answer to: What is your return policy?"}
+
+
+def test_history_keeps_sessions_apart():
+    completions = SlowCompletions(delay=0)
+    service = make_service(completions)
+    service.chat("Hello", session_id="a")
+
+    # Same question, but session "a" has history and "b" does not
+    chat_concurrently(service, [("Do you ship abroad?", "a"), ("Do you ship abroad?", "b")])
+
+    assert completions.calls == 3
+    assert len(service._get_session("a")[0]) == 4
+    assert len(service._get_session("b")[0]) == 2
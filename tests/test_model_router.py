@@ -0,0 +1,124 @@
+import threading
+import time
+import types
+
+import pytest
+
+from app.services import model_router
+from app.services.model_router import CircuitBreaker, ModelRouter, ModelUnavailableError
+
+
+class StubCompletions:
+    """Stub completions endpoint with a per-model delay or failure"""
+
+    def __init__(self, delays=None, failing=()):
+        self.delays = delays or {}
+        self.failing = set(failing)
+        self.calls = []
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, temperature, max_tokens, timeout=None):
+        with self._lock:
+            self.calls.append(model)
+            self.timeouts.append(timeout)
+        time.sleep(self.delays.get(model, 0))
+        if model in self.failing:
+            raise RuntimeError(f"{model} is down")
+        message = types.SimpleNamespace(content=f"answer from {model}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def make_router(completions, **kwargs):
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    kwargs.setdefault("latency_budget", 2.0)
+    kwargs.setdefault("hedge_delay", 1.0)
+    return ModelRouter(client, "primary", "fast", **kwargs)
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_caller_deadline_caps_the_budget():
+    completions = StubCompletions(delays={"primary": 1.0, "fast": 1.0})
+    router = make_router(completions, latency_budget=5.0, hedge_delay=5.0)
+
+    started = time.monotonic()
+    with pytest.raises(ModelUnavailableError):
+        router.complete(MESSAGES, deadline=started + 0.3)
+
+    assert time.monotonic() - started < 0.6
+    assert completions.timeouts[0] <= 0.3
+    assert router.stats()["budget_exceeded"] == 1
+
+
+def test_budget_applies_when_deadline_is_later():
+    completions = StubCompletions(delays={"primary": 1.0, "fast": 1.0})
+    router = make_router(completions, latency_budget=0.3, hedge_delay=5.0)
+
+    started = time.monotonic()
+    with pytest.raises(ModelUnavailableError):
+        router.complete(MESSAGES, deadline=started + 10.0)
+
+    assert time.monotonic() - started < 0.6
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def test_breaker_opens_and_probes_after_cool_down(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(model_router, "time", clock)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30.0)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now += 30.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+    # A failed probe re-opens for a full cool-down
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 29.0
+    assert breaker.state == "open"
+
+    clock.now += 1.0
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_open_breaker_routes_to_the_other_model():
+    completions = StubCompletions(failing={"primary"})
+    router = make_router(completions, failure_threshold=1, hedge_delay=5.0)
+
+    # The primary fails once, so the fast model answers and the breaker opens
+    assert router.complete(MESSAGES) == ("answer from fast", "fast")
+    assert router.stats()["by_model"]["primary"]["breaker"] == "open"
+
+    completions.calls.clear()
+    assert router.complete(MESSAGES) == ("answer from fast", "fast")
+    assert completions.calls == ["fast"]
+
+
+def test_all_breakers_open_fails_fast():
+    completions = StubCompletions(failing={"primary", "fast"})
+    router = make_router(completions, failure_threshold=1, hedge_delay=5.0)
+
+    with pytest.raises(ModelUnavailableError):
+        router.complete(MESSAGES)
+    completions.calls.clear()
+
+    with pytest.raises(ModelUnavailableError, match="circuit breakers are open"):
+        router.complete(MESSAGES)
+    assert completions.calls == []
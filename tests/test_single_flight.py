@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from app.services.single_flight import SingleFlight, CoalescingTimeout
+
+
+def start_leader(flight, key, fn):
+    """Run fn as the leader for key on a thread; returns (thread, outcome dict)"""
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = flight.do(key, fn)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, outcome
+
+
+def test_waiter_times_out_while_leader_finishes():
+    flight = SingleFlight()
+    key = flight.make_key("test", "question")
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(2)
+        return "answer"
+
+    leader, outcome = start_leader(flight, key, slow)
+    assert started.wait(2)
+
+    with pytest.raises(CoalescingTimeout):
+        flight.do(key, lambda: pytest.fail("waiter must not run fn"), timeout=0.05)
+
+    release.set()
+    leader.join(2)
+    assert outcome["result"] == "answer"
+    stats = flight.stats()
+    assert stats["by_namespace"]["test"]["timeouts"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_leader_error_reaches_every_waiter_and_frees_the_key():
+    flight = SingleFlight()
+    key = flight.make_key("test", "question")
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        raise ValueError("upstream failed")
+
+    leader, leader_outcome = start_leader(flight, key, failing)
+    assert started.wait(2)
+
+    waiter_errors = []
+
+    def wait():
+        try:
+            flight.do(key, failing, timeout=2)
+        except ValueError as e:
+            waiter_errors.append(e)
+
+    waiters = [threading.Thread(target=wait) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+    deadline = time.monotonic() + 2
+    while flight.stats()["by_namespace"]["test"]["coalesced"] < 3:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    release.set()
+    leader.join(2)
+    for waiter in waiters:
+        waiter.join(2)
+
+    assert isinstance(leader_outcome["error"], ValueError)
+    assert waiter_errors == [leader_outcome["error"]] * 3
+    assert len(calls) == 1
+    assert flight.stats()["by_namespace"]["test"]["errors"] == 1
+
+    # Failures are not cached: the next call runs again
+    assert flight.do(key, lambda: "recovered") == "recovered"
+
+
+def test_keys_normalize_case_and_whitespace():
+    assert SingleFlight.make_key("rag", "Where is  my order?", k=3) == \
+        SingleFlight.make_key("rag", "where is my order?", k=3)
+    assert SingleFlight.make_key("rag", "where is my order?", k=3) != \
+        SingleFlight.make_key("rag", "where is my order?", k=4)
@@ -0,0 +1,16 @@
+from app.routes import has_valid_token
+
+
+def test_matching_token_is_valid():
+    assert has_valid_token("secret", "secret")
+
+
+def test_unset_secret_never_matches():
+    assert not has_valid_token("", "")
+    assert not has_valid_token(None, "anything")
+    assert not has_valid_token("secret", None)
+
+
+def test_non_ascii_header_is_rejected_not_raised():
+    assert not has_valid_token("secret", "café")
+    assert has_valid_token("sécret", "sécret")
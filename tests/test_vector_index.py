@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import NumpyVectorIndex
+
+
+def random_vectors(n, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, 16)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype", NumpyVectorIndex.DTYPES)
+def test_search_finds_the_stored_vector_after_appends(tmp_path, dtype):
+    vectors = random_vectors(40)
+    index = NumpyVectorIndex(str(tmp_path), dtype=dtype)
+    index.add(vectors[:25], [f"chunk {i}" for i in range(25)],
+              [{"source": f"doc{i}.txt"} for i in range(25)])
+    index.add(vectors[25:], [f"chunk {i} café" for i in range(25, 40)],
+              [{"source": f"doc{i}.txt"} for i in range(25, 40)])
+
+    # A fresh reader (another worker) picks the dtype up from the files
+    reader = NumpyVectorIndex(str(tmp_path))
+    assert len(reader) == 40
+    assert reader.dtype == dtype
+
+    text, metadata, score = reader.search(vectors[31], k=2)[0]
+    assert text == "chunk 31 café"
+    assert metadata == {"source": "doc31.txt"}
+    assert score == pytest.approx(1.0, abs=0.02)
+
+
+def test_float32_scores_the_mapped_matrix_without_a_copy(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path))
+    index.add(random_vectors(10), [str(i) for i in range(10)])
+
+    assert index._vectors.dtype == np.float32
+    assert isinstance(index._vectors, np.memmap)
+    assert isinstance(index._documents, np.memmap)
+
+
+def test_clear_removes_the_index(tmp_path):
+    index = NumpyVectorIndex(str(tmp_path))
+    index.add(random_vectors(3), ["a", "b", "c"])
+    index.clear()
+
+    assert not index.exists()
+    assert list(tmp_path.iterdir()) == []
+    assert index.search(random_vectors(1)[0]) == []